@@ -0,0 +1,105 @@
+import time
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from capsules.models import KnowledgeCapsule
+from capsules.views import PublicCapsulePagination
+from playlists.models import Playlist, PlaylistItem
+
+
+class Rollback(Exception):
+    """Raised to discard the benchmark fixtures."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare offset and keyset pagination of public capsules at page 1 '
+        'and a deep page. Fixture rows are created in a transaction that is '
+        'rolled back afterwards.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=500, help='Deep page to measure')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per case')
+    
+    def handle(self, *args, **options):
+        page = options['page']
+        page_size = options['page_size']
+        self.repeat = options['repeat']
+        self.factory = APIRequestFactory()
+        
+        try:
+            with transaction.atomic():
+                self.create_fixtures(page * page_size + page_size)
+                queryset = KnowledgeCapsule.objects.filter(is_public=True)
+                
+                self.stdout.write(f'{"case":<24}{"ms/page":>10}{"queries":>10}')
+                for label, number in (('offset page 1', 1), (f'offset page {page}', page)):
+                    self.report(label, lambda: self.offset_page(queryset, number, page_size))
+                
+                deep_cursor = self.keyset_cursor(queryset, (page - 1) * page_size, page_size)
+                for label, cursor in (('keyset page 1', None), (f'keyset page {page}', deep_cursor)):
+                    self.report(label, lambda: self.keyset_page(queryset, cursor, page_size))
+                raise Rollback
+        except Rollback:
+            pass
+    
+    def create_fixtures(self, count):
+        User = get_user_model()
+        user = User.objects.create_user(
+            email='pagination-benchmark@example.com',
+            username='pagination-benchmark',
+            password=None
+        )
+        playlist = Playlist.objects.create(creator=user, title='Pagination benchmark')
+        items = PlaylistItem.objects.bulk_create(
+            PlaylistItem(playlist=playlist, title=f'Item {n}', url='https://example.com', order=n)
+            for n in range(count)
+        )
+        KnowledgeCapsule.objects.bulk_create(
+            KnowledgeCapsule(
+                user=user, playlist_item=item, summary='Benchmark',
+                is_public=True, likes_count=n % 50
+            )
+            for n, item in enumerate(items)
+        )
+    
+    def request(self, params):
+        return Request(self.factory.get('/api/capsules/public/', params))
+    
+    def offset_page(self, queryset, number, page_size):
+        paginator = PageNumberPagination()
+        paginator.page_size = page_size
+        ordered = queryset.order_by('-likes_count', '-created_at', 'id')
+        return paginator.paginate_queryset(ordered, self.request({'page': number}))
+    
+    def keyset_page(self, queryset, cursor, page_size):
+        params = {'page_size': page_size}
+        if cursor:
+            params['cursor'] = cursor
+        return PublicCapsulePagination().paginate_queryset(queryset, self.request(params))
+    
+    def keyset_cursor(self, queryset, offset, page_size):
+        """Cursor pointing just before row ``offset`` of the keyset ordering."""
+        paginator = PublicCapsulePagination()
+        paginator.paginate_queryset(queryset, self.request({'page_size': page_size}))
+        anchor = queryset.order_by(*paginator.ordering)[offset - 1]
+        link = paginator.encode_cursor(anchor, reverse=False)
+        return parse_qs(urlparse(link).query)[paginator.cursor_query_param][0]
+    
+    def report(self, label, run):
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        started = time.perf_counter()
+        for _ in range(self.repeat):
+            run()
+        elapsed = (time.perf_counter() - started) / self.repeat * 1000
+        self.stdout.write(f'{label:<24}{elapsed:>10.2f}{len(queries):>10}')
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('capsules', '0001_initial'),
+        ('playlists', '0005_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='knowledgecapsule',
+            index=models.Index(fields=['is_public', '-likes_count', '-created_at', 'id'], name='capsule_public_rank_idx'),
+        ),
+    ]
@@ -61,6 +61,13 @@ class KnowledgeCapsule(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['user', 'playlist_item']  # One capsule per item per user
+        indexes = [
+            # Keyset pagination of public capsules
+            models.Index(
+                fields=['is_public', '-likes_count', '-created_at', 'id'],
+                name='capsule_public_rank_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Capsule by {self.user.username}: {self.playlist_item.title}"
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from eduflex.serializers import DynamicFieldsMixin
 from .models import KnowledgeCapsule, CapsuleLike
 
 
-class KnowledgeCapsuleSerializer(serializers.ModelSerializer):
+class KnowledgeCapsuleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     item_title = serializers.CharField(source='playlist_item.title', read_only=True)
     is_liked = serializers.SerializerMethodField()
@@ -17,6 +18,7 @@ class KnowledgeCapsuleSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['likes_count', 'created_at', 'updated_at']
+        select_related_fields = {'username': 'user', 'item_title': 'playlist_item'}
     
     def get_is_liked(self, obj):
         request = self.context.get('request')
@@ -47,7 +49,7 @@ class KnowledgeCapsuleCreateSerializer(serializers.ModelSerializer):
         return [point for point in value if point.strip()]
 
 
-class CapsuleListSerializer(serializers.ModelSerializer):
+class CapsuleListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Lightweight serializer for list views."""
     username = serializers.CharField(source='user.username', read_only=True)
     item_title = serializers.CharField(source='playlist_item.title', read_only=True)
@@ -58,3 +60,4 @@ class CapsuleListSerializer(serializers.ModelSerializer):
             'id', 'username', 'item_title', 'summary',
             'likes_count', 'is_public', 'created_at'
         ]
+        select_related_fields = {'username': 'user', 'item_title': 'playlist_item'}
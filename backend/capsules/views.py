@@ -2,6 +2,7 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Q
+from eduflex.pagination import KeysetPagination
 from .models import KnowledgeCapsule, CapsuleLike
 from .serializers import (
     KnowledgeCapsuleSerializer,
@@ -10,6 +11,10 @@ from .serializers import (
 )
 
 
+class PublicCapsulePagination(KeysetPagination):
+    ordering = ('-likes_count', '-created_at', 'id')
+
+
 class CapsuleListCreateView(generics.ListCreateAPIView):
     """
     List user's capsules or create a new capsule.
@@ -22,9 +27,8 @@ class CapsuleListCreateView(generics.ListCreateAPIView):
         return CapsuleListSerializer
     
     def get_queryset(self):
-        return KnowledgeCapsule.objects.filter(
-            user=self.request.user
-        ).select_related('playlist_item')
+        queryset = KnowledgeCapsule.objects.filter(user=self.request.user)
+        return CapsuleListSerializer.optimize_queryset(queryset, self.request)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -51,9 +55,10 @@ class CapsuleDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def get_queryset(self):
         # Users can view their own and public capsules
-        return KnowledgeCapsule.objects.filter(
+        queryset = KnowledgeCapsule.objects.filter(
             Q(user=self.request.user) | Q(is_public=True)
-        ).select_related('user', 'playlist_item')
+        )
+        return KnowledgeCapsuleSerializer.optimize_queryset(queryset, self.request)
 
 
 class ItemCapsulesView(generics.ListAPIView):
@@ -66,11 +71,12 @@ class ItemCapsulesView(generics.ListAPIView):
     
     def get_queryset(self):
         item_id = self.kwargs.get('item_id')
-        return KnowledgeCapsule.objects.filter(
+        queryset = KnowledgeCapsule.objects.filter(
             playlist_item_id=item_id
         ).filter(
             Q(user=self.request.user) | Q(is_public=True)
-        ).select_related('user', 'playlist_item')
+        )
+        return KnowledgeCapsuleSerializer.optimize_queryset(queryset, self.request)
 
 
 class UserCapsulesView(generics.ListAPIView):
@@ -81,9 +87,8 @@ class UserCapsulesView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return KnowledgeCapsule.objects.filter(
-            user=self.request.user
-        ).select_related('playlist_item')
+        queryset = KnowledgeCapsule.objects.filter(user=self.request.user)
+        return CapsuleListSerializer.optimize_queryset(queryset, self.request)
 
 
 class PublicCapsulesView(generics.ListAPIView):
@@ -92,11 +97,11 @@ class PublicCapsulesView(generics.ListAPIView):
     """
     serializer_class = CapsuleListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PublicCapsulePagination
     
     def get_queryset(self):
-        return KnowledgeCapsule.objects.filter(
-            is_public=True
-        ).select_related('user', 'playlist_item').order_by('-likes_count', '-created_at')
+        queryset = KnowledgeCapsule.objects.filter(is_public=True)
+        return CapsuleListSerializer.optimize_queryset(queryset, self.request)
 
 
 class LikeCapsuleView(APIView):
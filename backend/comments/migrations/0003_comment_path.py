@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+PATH_DIGITS = 10
+
+
+def populate_paths(apps, schema_editor):
+    Comment = apps.get_model('comments', 'Comment')
+    parents = dict(Comment.objects.values_list('id', 'parent_id').iterator())
+    paths = {}
+    for comment_id in sorted(parents):
+        if comment_id in paths:
+            continue
+        # Walk up to the nearest ancestor with a known path
+        chain = [comment_id]
+        while parents[chain[-1]] is not None and parents[chain[-1]] not in paths:
+            chain.append(parents[chain[-1]])
+        parent_id = parents[chain[-1]]
+        prefix, depth = paths[parent_id] if parent_id is not None else ('', -1)
+        for ancestor_id in reversed(chain):
+            prefix, depth = f'{prefix}{ancestor_id:0{PATH_DIGITS}d}/', depth + 1
+            paths[ancestor_id] = (prefix, depth)
+
+    comments = [
+        Comment(id=comment_id, path=path, depth=depth)
+        for comment_id, (path, depth) in paths.items()
+    ]
+    Comment.objects.bulk_update(comments, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_keyset_pagination_indexes'),
+        ('playlists', '0007_playlist_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['playlist_item', 'path'], name='comment_item_path_idx'),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
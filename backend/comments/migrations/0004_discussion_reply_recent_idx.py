@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0003_comment_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='discussionreply',
+            index=models.Index(fields=['discussion', '-created_at', '-id'], name='reply_discussion_recent_idx'),
+        ),
+    ]
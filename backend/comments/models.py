@@ -1,11 +1,18 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 
+# Width of each zero-padded id in a comment path
+PATH_DIGITS = 10
+
 
 class Comment(models.Model):
     """
     Comments on playlist items for collaboration.
     Supports threaded replies via parent reference.
+    
+    ``path`` holds the zero-padded ids of the comment's ancestors and its
+    own, each followed by ``/``, so ordering by path walks a thread depth
+    first and a subtree is a range of paths (see ``comments.threads``).
     """
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
@@ -25,14 +32,36 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name='replies'
     )
+    path = models.TextField(editable=False, default='')
+    depth = models.PositiveIntegerField(editable=False, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of an item's top-level comments
+            models.Index(
+                fields=['playlist_item', 'parent', '-created_at', 'id'],
+                name='comment_item_recent_idx'
+            ),
+            # Subtrees of an item's threads in depth-first order
+            models.Index(fields=['playlist_item', 'path'], name='comment_item_path_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user.username} on {self.playlist_item.title}"
+    
+    def save(self, *args, **kwargs):
+        # A comment left without its path would drop out of every subtree
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if not self.path:
+                # The path ends with the comment's own id, known only after the insert
+                if self.parent_id:
+                    self.path, self.depth = self.parent.path, self.parent.depth + 1
+                self.path += f'{self.id:0{PATH_DIGITS}d}/'
+                Comment.objects.filter(id=self.id).update(path=self.path, depth=self.depth)
 
 
 class Discussion(models.Model):
@@ -81,6 +110,13 @@ class DiscussionReply(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Latest replies of a discussion and keyset pagination of them
+            models.Index(
+                fields=['discussion', '-created_at', '-id'],
+                name='reply_discussion_recent_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Reply by {self.author.username}"
@@ -1,4 +1,7 @@
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
+from eduflex.serializers import DynamicFieldsMixin
 from .models import Comment, Discussion, DiscussionReply
 
 
@@ -9,15 +12,13 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = [
-            'id', 'content', 'username', 'parent', 
+            'id', 'content', 'username', 'parent', 'depth',
             'replies', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['parent', 'depth', 'created_at', 'updated_at']
     
     def get_replies(self, obj):
-        if obj.parent is None:  # Only get replies for top-level comments
-            replies = obj.replies.all()
-            return CommentSerializer(replies, many=True).data
+        # Filled in by comments.threads.serialize_threads
         return []
 
 
@@ -25,6 +26,14 @@ class CommentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['playlist_item', 'content', 'parent']
+    
+    def validate(self, attrs):
+        parent = attrs.get('parent')
+        if parent is not None and parent.playlist_item_id != attrs['playlist_item'].id:
+            raise serializers.ValidationError(
+                {'parent': 'A reply must be on the same item as its parent.'}
+            )
+        return attrs
 
 
 class DiscussionReplySerializer(serializers.ModelSerializer):
@@ -36,10 +45,18 @@ class DiscussionReplySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class DiscussionSerializer(serializers.ModelSerializer):
+class DiscussionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Discussion with its reply count and only its latest replies.
+    
+    ``replies`` holds the ``LATEST_REPLIES`` newest replies, newest first;
+    the rest are paged through ``DiscussionRepliesView``.
+    """
+    
+    LATEST_REPLIES = 3
+    
     author_username = serializers.CharField(source='author.username', read_only=True)
     reply_count = serializers.SerializerMethodField()
-    replies = DiscussionReplySerializer(many=True, read_only=True)
+    replies = serializers.SerializerMethodField()
     
     class Meta:
         model = Discussion
@@ -48,9 +65,41 @@ class DiscussionSerializer(serializers.ModelSerializer):
             'is_pinned', 'reply_count', 'replies', 'created_at', 'updated_at'
         ]
         read_only_fields = ['is_pinned', 'created_at', 'updated_at']
+        expandable_fields = {'replies': None}
+        select_related_fields = {'author_username': 'author'}
+    
+    @classmethod
+    def optimize_queryset(cls, queryset, request):
+        """Also annotate the reply count and prefetch the latest replies."""
+        queryset = super().optimize_queryset(queryset, request)
+        if cls.renders_expanded('reply_count', request):
+            # A correlated count keeps the query ungrouped, and so ordered
+            counts = DiscussionReply.objects.filter(
+                discussion=OuterRef('pk')
+            ).order_by().values('discussion').annotate(total=Count('id')).values('total')
+            queryset = queryset.annotate(reply_total=Coalesce(Subquery(counts), 0))
+        if cls.renders_expanded('replies', request):
+            latest = DiscussionReply.objects.select_related('author').order_by(
+                '-created_at', '-id'
+            )[:cls.LATEST_REPLIES]
+            queryset = queryset.prefetch_related(
+                Prefetch('replies', queryset=latest, to_attr='latest_replies')
+            )
+        return queryset
     
     def get_reply_count(self, obj):
+        if hasattr(obj, 'reply_total'):
+            return obj.reply_total
         return obj.replies.count()
+    
+    def get_replies(self, obj):
+        if hasattr(obj, 'latest_replies'):
+            replies = obj.latest_replies
+        else:
+            replies = obj.replies.select_related('author').order_by(
+                '-created_at', '-id'
+            )[:self.LATEST_REPLIES]
+        return DiscussionReplySerializer(replies, many=True).data
 
 
 class DiscussionCreateSerializer(serializers.ModelSerializer):
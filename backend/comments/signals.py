@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from playlists.models import Playlist
+from .models import Discussion
+
+
+@receiver(post_save, sender=Discussion)
+def count_created_discussion(sender, instance, created, **kwargs):
+    if created:
+        Playlist.objects.filter(id=instance.playlist_id).adjust_counters(discussion_count=1)
+
+
+@receiver(post_delete, sender=Discussion)
+def count_deleted_discussion(sender, instance, **kwargs):
+    Playlist.objects.filter(id=instance.playlist_id).adjust_counters(discussion_count=-1)
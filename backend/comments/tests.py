@@ -0,0 +1,172 @@
+import importlib
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from playlists.models import Playlist, PlaylistItem
+from . import threads
+from .models import Comment, Discussion, DiscussionReply
+from .serializers import DiscussionSerializer
+
+comment_path_migration = importlib.import_module('comments.migrations.0003_comment_path')
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='learner', email='learner@example.com', password='pass'
+        )
+        playlist = Playlist.objects.create(creator=self.user, title='Course')
+        self.item = PlaylistItem.objects.create(
+            playlist=playlist, title='Lesson', url='https://example.com/lesson'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cache.clear()
+    
+    def comment(self, content, parent=None, item=None):
+        return Comment.objects.create(
+            user=self.user, playlist_item=item or self.item, content=content, parent=parent
+        )
+    
+    def tree(self, nodes):
+        return [(node['content'], node['depth'], self.tree(node['replies'])) for node in nodes]
+    
+    def test_threads_nest_depth_first_with_siblings_oldest_first(self):
+        root = self.comment('root')
+        first = self.comment('first', root)
+        second = self.comment('second', root)
+        self.comment('second reply', second)
+        # Deep enough that the path is far longer than any single id
+        parent = first
+        for depth in range(2, 62):
+            parent = self.comment(f'level {depth}', parent)
+        other_root = self.comment('other root')
+        
+        with self.assertNumQueries(1):
+            data = threads.serialize_threads([root, other_root])
+        
+        chain = []
+        for depth in reversed(range(2, 62)):
+            chain = [(f'level {depth}', depth, chain)]
+        self.assertEqual(self.tree(data), [
+            ('root', 0, [
+                ('first', 1, chain),
+                ('second', 1, [('second reply', 2, [])]),
+            ]),
+            ('other root', 0, []),
+        ])
+        self.assertEqual(parent.path.count('/'), 62)
+    
+    def test_failed_path_update_leaves_no_comment_behind(self):
+        with mock.patch.object(QuerySet, 'update', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.comment('lost')
+        
+        self.assertFalse(Comment.objects.exists())
+    
+    def test_backfill_matches_the_paths_assigned_on_save(self):
+        root = self.comment('root')
+        reply = self.comment('reply', root)
+        self.comment('nested', reply)
+        # A parent with a higher id than its reply, as after a re-parent
+        later = self.comment('later root')
+        Comment.objects.filter(id=root.id).update(parent=later)
+        expected = {
+            comment.id: (comment.path, comment.depth)
+            for comment in Comment.objects.all()
+        }
+        later_path = f'{later.id:0{comment_path_migration.PATH_DIGITS}d}/'
+        for comment_id, (path, depth) in expected.items():
+            if comment_id != later.id:
+                expected[comment_id] = (later_path + path, depth + 1)
+        Comment.objects.update(path='', depth=0)
+        
+        comment_path_migration.populate_paths(apps, None)
+        
+        self.assertEqual(
+            {comment.id: (comment.path, comment.depth) for comment in Comment.objects.all()},
+            expected
+        )
+    
+    def test_reply_on_another_item_is_rejected(self):
+        other_item = PlaylistItem.objects.create(
+            playlist=self.item.playlist, title='Other', url='https://example.com/other'
+        )
+        parent = self.comment('elsewhere', item=other_item)
+        
+        response = self.client.post('/api/comments/', {
+            'playlist_item': self.item.id, 'content': 'Reply', 'parent': parent.id
+        }, format='json')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('parent', response.data)
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+class DiscussionPayloadTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='learner', email='learner@example.com', password='pass'
+        )
+        self.playlist = Playlist.objects.create(creator=self.user, title='Course')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cache.clear()
+    
+    def discussion(self, replies):
+        discussion = Discussion.objects.create(
+            playlist=self.playlist, author=self.user, title='Question', content='Why?'
+        )
+        DiscussionReply.objects.bulk_create([
+            DiscussionReply(discussion=discussion, author=self.user, content=f'Reply {index}')
+            for index in range(replies)
+        ])
+        return discussion
+    
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/comments/discussions/playlist/{self.playlist.id}/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data['results']
+    
+    def test_list_costs_the_same_queries_however_many_replies(self):
+        self.discussion(replies=1)
+        few, _ = self.list_queries()
+        
+        for replies in (0, 2, 5, 12):
+            self.discussion(replies)
+        many, results = self.list_queries()
+        
+        self.assertEqual(many, few)
+        # Playlist lookup, page count, discussions with their reply totals, latest replies
+        with self.assertNumQueries(4):
+            self.client.get(f'/api/comments/discussions/playlist/{self.playlist.id}/')
+        by_count = sorted(
+            (discussion['reply_count'], len(discussion['replies'])) for discussion in results
+        )
+        self.assertEqual(by_count, [(0, 0), (1, 1), (2, 2), (5, 3), (12, 3)])
+    
+    def test_first_page_of_replies_matches_the_embedded_latest_replies(self):
+        discussion = self.discussion(replies=8)
+        # Replies posted in the same instant still page in one order
+        DiscussionReply.objects.filter(discussion=discussion).update(created_at=discussion.created_at)
+        
+        embedded = self.client.get(f'/api/comments/discussions/{discussion.id}/').data['replies']
+        url = f'/api/comments/discussions/{discussion.id}/replies/'
+        first = self.client.get(url, {'page_size': DiscussionSerializer.LATEST_REPLIES}).data
+        self.assertEqual(first['results'], embedded)
+        
+        seen = [reply['id'] for reply in first['results']]
+        page = first
+        while page['next']:
+            page = self.client.get(page['next']).data
+            seen += [reply['id'] for reply in page['results']]
+        self.assertEqual(seen, sorted(discussion.replies.values_list('id', flat=True), reverse=True))
@@ -0,0 +1,50 @@
+"""
+Threaded comment loading.
+
+A comment's ``path`` is its ancestors' ids and its own, zero padded and
+each followed by ``/``. Every reply below a comment therefore has a path
+in the range ``[path, path + '~')``, and sorting by path lists a thread
+depth first with siblings oldest first. A page of threads with all of
+their replies loads in one indexed query, and since parents sort before
+their replies the tree is nested in a single pass over the rows.
+"""
+from django.db.models import Q
+
+from .models import Comment
+from .serializers import CommentSerializer
+
+# Sorts after the digits and the separator used in paths
+PATH_END = '~'
+
+
+def subtree_range(path):
+    """Q matching every reply below the comment at ``path``."""
+    return Q(path__gt=path, path__lt=path + PATH_END)
+
+
+def load_replies(comments):
+    """All replies below ``comments`` in depth-first order, in one query."""
+    if not comments:
+        return []
+    ranges = Q()
+    for comment in comments:
+        ranges |= subtree_range(comment.path)
+    return list(Comment.objects.filter(
+        ranges,
+        playlist_item_id__in={comment.playlist_item_id for comment in comments}
+    ).select_related('user').order_by('path'))
+
+
+def serialize_threads(comments, context=None):
+    """Serialize ``comments`` with their reply trees nested under ``replies``."""
+    comments = list(comments)
+    replies = load_replies(comments)
+    data = CommentSerializer(comments + replies, many=True, context=context).data
+
+    nodes = {}
+    for comment, node in zip(comments, data):
+        nodes[comment.id] = node
+    for reply, node in zip(replies, data[len(comments):]):
+        nodes[reply.id] = node
+        nodes[reply.parent_id]['replies'].append(node)
+    return data[:len(comments)]
@@ -11,5 +11,6 @@ urlpatterns = [
     path('discussions/', views.DiscussionListCreateView.as_view(), name='discussion-list-create'),
     path('discussions/<int:pk>/', views.DiscussionDetailView.as_view(), name='discussion-detail'),
     path('discussions/<int:discussion_id>/reply/', views.DiscussionReplyView.as_view(), name='discussion-reply'),
+    path('discussions/<int:discussion_id>/replies/', views.DiscussionRepliesView.as_view(), name='discussion-replies'),
     path('discussions/playlist/<int:playlist_id>/', views.PlaylistDiscussionsView.as_view(), name='playlist-discussions'),
 ]
@@ -1,6 +1,11 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.shortcuts import get_object_or_404
+from eduflex.pagination import KeysetPagination
+from playlists import access
+from playlists.models import Playlist, PlaylistItem
+from . import threads
 from .models import Comment, Discussion, DiscussionReply
 from .serializers import (
     CommentSerializer, CommentCreateSerializer,
@@ -9,11 +14,43 @@ from .serializers import (
 )
 
 
-class CommentListCreateView(generics.ListCreateAPIView):
+class CommentPagination(KeysetPagination):
+    ordering = ('-created_at', 'id')
+
+
+class ReplyPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+def get_visible_item(request, item_id):
+    """Playlist item the user may see, or 404/403."""
+    item = get_object_or_404(PlaylistItem.objects.select_related('playlist'), id=item_id)
+    access.require_view(request, item.playlist)
+    return item
+
+
+def get_visible_playlist(request, playlist_id):
+    """Playlist the user may see, or 404/403."""
+    playlist = get_object_or_404(Playlist, id=playlist_id)
+    access.require_view(request, playlist)
+    return playlist
+
+
+class ThreadListMixin:
+    """List a page of top-level comments, each with its whole reply tree."""
+    
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        data = threads.serialize_threads(page, self.get_serializer_context())
+        return self.get_paginated_response(data)
+
+
+class CommentListCreateView(ThreadListMixin, generics.ListCreateAPIView):
     """
     List comments for a playlist item or create new comment.
     """
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CommentPagination
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -23,6 +60,7 @@ class CommentListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         item_id = self.request.query_params.get('item_id')
         if item_id:
+            get_visible_item(self.request, item_id)
             return Comment.objects.filter(
                 playlist_item_id=item_id, 
                 parent=None  # Only top-level comments
@@ -30,6 +68,7 @@ class CommentListCreateView(generics.ListCreateAPIView):
         return Comment.objects.none()
     
     def perform_create(self, serializer):
+        access.require_view(self.request, serializer.validated_data['playlist_item'].playlist)
         serializer.save(user=self.request.user)
 
 
@@ -42,22 +81,32 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Comment.objects.filter(user=self.request.user)
+        return Comment.objects.filter(user=self.request.user).select_related('user')
+    
+    def retrieve(self, request, *args, **kwargs):
+        comment = self.get_object()
+        return Response(threads.serialize_threads([comment], self.get_serializer_context())[0])
+    
+    def update(self, request, *args, **kwargs):
+        super().update(request, *args, **kwargs)
+        return self.retrieve(request, *args, **kwargs)
 
 
-class ItemCommentsView(generics.ListAPIView):
+class ItemCommentsView(ThreadListMixin, generics.ListAPIView):
     """
     Get all comments for a specific playlist item.
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CommentPagination
     
     def get_queryset(self):
         item_id = self.kwargs.get('item_id')
+        get_visible_item(self.request, item_id)
         return Comment.objects.filter(
             playlist_item_id=item_id,
             parent=None
-        ).select_related('user').prefetch_related('replies__user')
+        ).select_related('user')
 
 
 class DiscussionListCreateView(generics.ListCreateAPIView):
@@ -74,12 +123,13 @@ class DiscussionListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         playlist_id = self.request.query_params.get('playlist_id')
         if playlist_id:
-            return Discussion.objects.filter(
-                playlist_id=playlist_id
-            ).select_related('author').prefetch_related('replies__author')
+            get_visible_playlist(self.request, playlist_id)
+            queryset = Discussion.objects.filter(playlist_id=playlist_id)
+            return DiscussionSerializer.optimize_queryset(queryset, self.request)
         return Discussion.objects.none()
     
     def perform_create(self, serializer):
+        access.require_view(self.request, serializer.validated_data['playlist'])
         serializer.save(author=self.request.user)
 
 
@@ -91,7 +141,13 @@ class DiscussionDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Discussion.objects.all()
+        queryset = Discussion.objects.select_related('playlist')
+        return DiscussionSerializer.optimize_queryset(queryset, self.request)
+    
+    def get_object(self):
+        discussion = super().get_object()
+        access.require_view(self.request, discussion.playlist)
+        return discussion
 
 
 class DiscussionReplyView(APIView):
@@ -102,12 +158,13 @@ class DiscussionReplyView(APIView):
     
     def post(self, request, discussion_id):
         try:
-            discussion = Discussion.objects.get(id=discussion_id)
+            discussion = Discussion.objects.select_related('playlist').get(id=discussion_id)
         except Discussion.DoesNotExist:
             return Response(
                 {'error': 'Discussion not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        access.require_view(request, discussion.playlist)
         
         content = request.data.get('content')
         if not content:
@@ -126,6 +183,24 @@ class DiscussionReplyView(APIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+class DiscussionRepliesView(generics.ListAPIView):
+    """
+    Page through the replies of a discussion, newest first.
+    The first page matches the latest replies embedded in the discussion.
+    """
+    serializer_class = DiscussionReplySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReplyPagination
+    
+    def get_queryset(self):
+        discussion = get_object_or_404(
+            Discussion.objects.select_related('playlist'),
+            id=self.kwargs.get('discussion_id')
+        )
+        access.require_view(self.request, discussion.playlist)
+        return discussion.replies.select_related('author')
+
+
 class PlaylistDiscussionsView(generics.ListAPIView):
     """
     Get all discussions for a specific playlist.
@@ -135,6 +210,6 @@ class PlaylistDiscussionsView(generics.ListAPIView):
     
     def get_queryset(self):
         playlist_id = self.kwargs.get('playlist_id')
-        return Discussion.objects.filter(
-            playlist_id=playlist_id
-        ).select_related('author').prefetch_related('replies__author')
+        get_visible_playlist(self.request, playlist_id)
+        queryset = Discussion.objects.filter(playlist_id=playlist_id)
+        return DiscussionSerializer.optimize_queryset(queryset, self.request)
@@ -0,0 +1,75 @@
+"""
+Sparse fieldsets and expandable relations for read endpoints.
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _param_set(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+class DynamicFieldsMixin:
+    """Serializer mixin for the ``?fields=`` and ``?expand=`` query parameters.
+
+    ``?fields=id,title`` limits the top-level output to the named fields.
+    Relations in ``Meta.expandable_fields`` are embedded by default; once
+    ``?expand=`` is given only the named ones are, and the rest collapse to
+    their primary key (``'pk'``) or are dropped (``None``).
+
+    ``Meta.select_related_fields`` and ``Meta.prefetch_related_fields`` map
+    output fields to the relation paths they read, so views can skip the
+    joins and prefetches of fields that are not rendered with
+    ``optimize_queryset()``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        fields, expand = _param_set(request, 'fields'), _param_set(request, 'expand')
+        if expand is not None:
+            for name, collapsed in getattr(self.Meta, 'expandable_fields', {}).items():
+                if name in expand or name not in self.fields:
+                    continue
+                if collapsed == 'pk':
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+                else:
+                    self.fields.pop(name)
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+    @classmethod
+    def renders_expanded(cls, name, request):
+        """Whether ``name`` is rendered with its related data loaded."""
+        if request is None or request.method not in SAFE_METHODS:
+            return True
+        fields, expand = _param_set(request, 'fields'), _param_set(request, 'expand')
+        if fields is not None and name not in fields:
+            return False
+        if expand is not None and name in getattr(cls.Meta, 'expandable_fields', {}):
+            return name in expand
+        return True
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request):
+        """Apply only the joins and prefetches the requested fields need."""
+        select = {
+            path for name, path in getattr(cls.Meta, 'select_related_fields', {}).items()
+            if cls.renders_expanded(name, request)
+        }
+        prefetch = {
+            path for name, path in getattr(cls.Meta, 'prefetch_related_fields', {}).items()
+            if cls.renders_expanded(name, request)
+        }
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
@@ -73,9 +73,42 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than shared-cache memory, where concurrent writers
+        # fail at once instead of waiting; the progress tests rely on it
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'eduflex',
+    }
+}
+
+# Seconds a user's collaborator permission on a playlist stays cached
+PLAYLIST_ACCESS_CACHE_TIMEOUT = 300
+
+# Seconds a user's completion bitmap for a playlist stays cached
+PROGRESS_BITMAP_CACHE_TIMEOUT = 60 * 60
+
+# Seconds a user's dashboard statistics stay cached; progress writes retire them
+PROGRESS_STATS_CACHE_TIMEOUT = 10 * 60
+
+# Seconds before a stored creator funnel is recomputed on read
+CREATOR_FUNNEL_MAX_AGE = 60 * 60
+
+# Seconds before an in-memory leaderboard checks for a newer snapshot
+# from reconcile_leaderboards
+LEADERBOARD_RELOAD_SECONDS = 60
+
+# Watch-time increments are buffered per process and written after this
+# many seconds or once this many (user, item) pairs are pending; see
+# progress.buffer. 0 seconds writes every increment immediately.
+PROGRESS_BUFFER_FLUSH_SECONDS = 10
+PROGRESS_BUFFER_MAX_KEYS = 1000
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Note
+from .models import Note, NoteChange
 
 
 @admin.register(Note)
@@ -7,3 +7,10 @@ class NoteAdmin(admin.ModelAdmin):
     list_display = ['user', 'title', 'playlist_item', 'created_at', 'updated_at']
     list_filter = ['created_at']
     search_fields = ['user__email', 'title', 'content']
+
+
+@admin.register(NoteChange)
+class NoteChangeAdmin(admin.ModelAdmin):
+    list_display = ['seq', 'user', 'note_id', 'is_deleted', 'changed_at']
+    list_filter = ['is_deleted']
+    search_fields = ['user__email']
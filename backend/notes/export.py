@@ -0,0 +1,254 @@
+"""
+Export of a user's notes and knowledge capsules.
+
+Notes and capsules are read with two ``iterator()`` queries, each already
+ordered by playlist and item position, and merged in that order, so an
+export only ever holds one chunk of rows and one item's entries in
+memory. The writers turn the merged stream into Markdown or JSON text
+piece by piece, and ``zipped`` compresses that text as it is produced.
+"""
+import heapq
+import zipfile
+from itertools import chain, groupby
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from capsules.models import KnowledgeCapsule
+from .models import Note
+
+FORMATS = ('markdown', 'json')
+EXTENSIONS = {'markdown': 'md', 'json': 'json'}
+
+CHUNK_SIZE = 2000
+# Text is handed to the response in pieces of about this many characters
+WRITE_SIZE = 64 * 1024
+
+NOTE_FIELDS = ('id', 'title', 'content', 'timestamp_seconds', 'created_at', 'updated_at')
+CAPSULE_FIELDS = (
+    'id', 'summary', 'key_points', 'common_mistakes', 'code_snippet',
+    'code_language', 'is_public', 'created_at', 'updated_at',
+)
+
+
+def _position(row):
+    """Sort key matching the ``order_by`` of both queries.
+
+    Playlists by id with unfiled notes last, then playlist-level notes
+    before items, then items in playlist order.
+    """
+    return (
+        row['group_id'] is None,
+        row['group_id'] or 0,
+        row['item_id'] is not None,
+        row['item_order'] or 0,
+        row['item_id'] or 0,
+    )
+
+
+def _notes(user):
+    rows = Note.objects.filter(user=user).annotate(
+        group_id=Coalesce('playlist_item__playlist_id', 'playlist_id')
+    ).order_by(
+        F('group_id').asc(nulls_last=True),
+        F('playlist_item__order').asc(nulls_first=True),
+        F('playlist_item_id').asc(nulls_first=True),
+        F('timestamp_seconds').asc(nulls_first=True),
+        'created_at',
+        'id',
+    ).values(
+        *NOTE_FIELDS,
+        'group_id',
+        playlist_title=Coalesce('playlist_item__playlist__title', 'playlist__title'),
+        item_id=F('playlist_item_id'),
+        item_title=F('playlist_item__title'),
+        item_order=F('playlist_item__order'),
+    )
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        row['kind'] = 'note'
+        yield row
+
+
+def _capsules(user):
+    rows = KnowledgeCapsule.objects.filter(user=user).order_by(
+        'playlist_item__playlist_id',
+        'playlist_item__order',
+        'playlist_item_id',
+    ).values(
+        *CAPSULE_FIELDS,
+        group_id=F('playlist_item__playlist_id'),
+        playlist_title=F('playlist_item__playlist__title'),
+        item_id=F('playlist_item_id'),
+        item_title=F('playlist_item__title'),
+        item_order=F('playlist_item__order'),
+    )
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        row['kind'] = 'capsule'
+        yield row
+
+
+def grouped(user):
+    """Yield ``(playlist, items)`` in order; ``items`` yields ``(item, entries)``.
+
+    ``playlist`` and ``item`` are dicts with ``id`` and ``title``; ``item`` is
+    None for notes on the playlist itself and ``playlist`` for unfiled notes.
+    Consume each group before moving to the next.
+    """
+    rows = heapq.merge(_notes(user), _capsules(user), key=_position)
+    for playlist_id, playlist_rows in groupby(rows, key=lambda row: row['group_id']):
+        first = next(playlist_rows)
+        playlist = None if playlist_id is None else {'id': playlist_id, 'title': first['playlist_title']}
+        yield playlist, _items(first, playlist_rows)
+
+
+def _items(first, rows):
+    rows = chain([first], rows)
+    for item_id, entries in groupby(rows, key=lambda row: row['item_id']):
+        first = next(entries)
+        item = None if item_id is None else {'id': item_id, 'title': first['item_title']}
+        yield item, chain([first], entries)
+
+
+def _timestamp(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f'{hours}:{minutes:02d}:{seconds:02d}'
+    return f'{minutes}:{seconds:02d}'
+
+
+def _markdown_entry(entry):
+    if entry['kind'] == 'note':
+        heading = entry['title'] or 'Note'
+        if entry['timestamp_seconds'] is not None:
+            heading = f"[{_timestamp(entry['timestamp_seconds'])}] {heading}"
+        return f"#### {heading}\n\n{entry['content']}\n\n"
+
+    parts = [f"#### Knowledge capsule\n\n{entry['summary']}\n\n"]
+    if entry['key_points']:
+        parts.append('Key points:\n\n')
+        parts.extend(f'- {point}\n' for point in entry['key_points'])
+        parts.append('\n')
+    if entry['common_mistakes']:
+        parts.append(f"Common mistakes:\n\n{entry['common_mistakes']}\n\n")
+    if entry['code_snippet']:
+        parts.append(f"```{entry['code_language']}\n{entry['code_snippet']}\n```\n\n")
+    return ''.join(parts)
+
+
+def markdown(user):
+    """The export as Markdown, one piece at a time."""
+    yield f"# Notes of {user.username}\n\nExported {timezone.now():%Y-%m-%d %H:%M} UTC\n\n"
+    for playlist, items in grouped(user):
+        yield f"## {playlist['title']}\n\n" if playlist else '## Other notes\n\n'
+        for item, entries in items:
+            if item:
+                yield f"### {item['title']}\n\n"
+            elif playlist:
+                yield '### Playlist notes\n\n'
+            for entry in entries:
+                yield _markdown_entry(entry)
+
+
+def _json_entry(entry):
+    fields = NOTE_FIELDS if entry['kind'] == 'note' else CAPSULE_FIELDS
+    return {field: entry[field] for field in fields}
+
+
+def as_json(user):
+    """The export as one JSON document, one piece at a time.
+
+    Each playlist has its own ``notes`` and an ``items`` list; every item
+    has its ``notes`` and its ``capsule`` (or null). Unfiled notes are a
+    playlist with a null ``id``. Notes sort before their item's capsule
+    and playlist-level notes before the items, so every list can be
+    written as its entries arrive.
+    """
+    encoder = DjangoJSONEncoder()
+    yield '{"exported_at": %s, "playlists": [' % encoder.encode(timezone.now())
+    for playlist_index, (playlist, items) in enumerate(grouped(user)):
+        playlist = playlist or {'id': None, 'title': None}
+        yield (', ' if playlist_index else '') + encoder.encode(playlist)[:-1] + ', "notes": ['
+        item_index = 0
+        for item, entries in items:
+            if item is None:
+                yield from _json_entries(encoder, entries)
+                continue
+            yield ('], "items": [' if item_index == 0 else ', ') + encoder.encode(item)[:-1]
+            item_index += 1
+            yield ', "notes": ['
+            capsule = yield from _json_entries(encoder, entries)
+            yield '], "capsule": %s}' % encoder.encode(capsule and _json_entry(capsule))
+        yield ']}' if item_index else '], "items": []}'
+    yield ']}\n'
+
+
+def _json_entries(encoder, entries):
+    """Write notes as array elements and return the capsule among them, if any."""
+    capsule = None
+    count = 0
+    for entry in entries:
+        if entry['kind'] == 'capsule':
+            capsule = entry
+            continue
+        yield (', ' if count else '') + encoder.encode(_json_entry(entry))
+        count += 1
+    return capsule
+
+
+WRITERS = {'markdown': markdown, 'json': as_json}
+
+
+def buffered(pieces, size=WRITE_SIZE):
+    """Join small text pieces into chunks of about ``size`` characters."""
+    buffer = []
+    length = 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+class _Sink:
+    """Write-only file that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zipped(chunks, filename):
+    """Compress text ``chunks`` into a zip holding ``filename``, as it goes.
+
+    The archive is written to a non-seekable stream, so sizes go in data
+    descriptors after the file and nothing has to be rewound.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        info = zipfile.ZipInfo(filename, date_time=timezone.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(info, 'w') as entry:
+            for chunk in chunks:
+                entry.write(chunk.encode())
+                data = sink.drain()
+                if data:
+                    yield data
+    yield sink.drain()
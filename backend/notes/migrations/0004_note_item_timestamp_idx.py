@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_initial'),
+        ('playlists', '0007_playlist_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', 'playlist_item', 'timestamp_seconds'], name='note_item_timestamp_idx'),
+        ),
+    ]
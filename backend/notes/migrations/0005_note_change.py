@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_existing_notes(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    NoteChange = apps.get_model('notes', 'NoteChange')
+    notes = Note.objects.order_by('updated_at', 'id').values_list('id', 'user_id')
+    NoteChange.objects.bulk_create(
+        (NoteChange(note_id=note_id, user_id=user_id) for note_id, user_id in notes.iterator()),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_item_timestamp_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('note_id', models.BigIntegerField(unique=True)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='note_changes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['seq'],
+                'indexes': [models.Index(fields=['user', 'seq'], name='note_change_user_seq_idx')],
+            },
+        ),
+        migrations.RunPython(record_existing_notes, migrations.RunPython.noop),
+    ]
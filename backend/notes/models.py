@@ -36,6 +36,13 @@ class Note(models.Model):
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Notes of an item in video order, and timestamp windows of them
+            models.Index(
+                fields=['user', 'playlist_item', 'timestamp_seconds'],
+                name='note_item_timestamp_idx'
+            ),
+        ]
     
     def __str__(self):
         if self.playlist_item:
@@ -43,3 +50,32 @@ class Note(models.Model):
         elif self.playlist:
             return f"Note on {self.playlist.title}"
         return f"Note by {self.user.email}"
+
+
+class NoteChange(models.Model):
+    """Latest change to each note, numbered in the order changes happened.
+    
+    The log is compacted: a note keeps only its latest change, which moves
+    it to a new, higher ``seq``. Deleted notes leave a tombstone.
+    """
+    
+    seq = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='note_changes'
+    )
+    note_id = models.BigIntegerField(unique=True)
+    is_deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['seq']
+        indexes = [
+            # Changes feed of a user since a sequence number
+            models.Index(fields=['user', 'seq'], name='note_change_user_seq_idx'),
+        ]
+    
+    def __str__(self):
+        action = 'deleted' if self.is_deleted else 'changed'
+        return f"Note {self.note_id} {action} (#{self.seq})"
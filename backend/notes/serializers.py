@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .export import FORMATS
 from .models import Note
 
 
@@ -22,3 +23,85 @@ class NoteCreateUpdateSerializer(serializers.ModelSerializer):
         model = Note
         fields = ['playlist_item_id', 'playlist_id', 'title', 'content', 
                   'timestamp_seconds']
+
+
+class NoteWindowQuerySerializer(serializers.Serializer):
+    """Serializer for the timestamp window query parameters of an item's notes."""
+    
+    MAX_LIMIT = 100
+    
+    from_ = serializers.IntegerField(required=False, min_value=0)
+    to = serializers.IntegerField(required=False, min_value=0)
+    near = serializers.IntegerField(required=False, min_value=0)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=MAX_LIMIT, default=10)
+    
+    def get_fields(self):
+        # ``from`` is a keyword, so the field is declared as ``from_``
+        fields = super().get_fields()
+        fields['from'] = fields.pop('from_')
+        return fields
+    
+    def validate(self, attrs):
+        if 'near' in attrs and ('from' in attrs or 'to' in attrs):
+            raise serializers.ValidationError('Use either near or from/to, not both.')
+        if attrs.get('from') is not None and attrs.get('to') is not None and attrs['from'] > attrs['to']:
+            raise serializers.ValidationError('from must not be after to.')
+        return attrs
+
+
+class NoteSyncQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the notes changes feed."""
+    
+    MAX_LIMIT = 1000
+    
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, default=500)
+
+
+class NoteOperationSerializer(serializers.Serializer):
+    """Serializer for one create, update or delete pushed by a client.
+    
+    Updates and deletes carry the ``updated_at`` the client last saw and
+    only apply if the note has not changed since.
+    """
+    
+    OPS = ('create', 'update', 'delete')
+    
+    op = serializers.ChoiceField(choices=OPS)
+    id = serializers.IntegerField(required=False)
+    updated_at = serializers.DateTimeField(required=False)
+    client_id = serializers.CharField(max_length=64, required=False)
+    playlist_item_id = serializers.IntegerField(required=False, allow_null=True)
+    playlist_id = serializers.IntegerField(required=False, allow_null=True)
+    title = serializers.CharField(max_length=200, required=False, allow_blank=True)
+    content = serializers.CharField(required=False, allow_blank=True)
+    timestamp_seconds = serializers.IntegerField(required=False, allow_null=True, min_value=0)
+    
+    def validate(self, attrs):
+        if attrs['op'] == 'create':
+            if 'content' not in attrs:
+                raise serializers.ValidationError('content is required to create a note.')
+        elif 'id' not in attrs or 'updated_at' not in attrs:
+            raise serializers.ValidationError(f"id and updated_at are required to {attrs['op']} a note.")
+        return attrs
+
+
+class NoteSyncPushSerializer(serializers.Serializer):
+    """Serializer for a batch of note operations."""
+    
+    MAX_OPERATIONS = 500
+    
+    operations = NoteOperationSerializer(many=True, allow_empty=False, max_length=MAX_OPERATIONS)
+
+
+class NoteExportQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the notes export."""
+    
+    # ``format`` is taken by DRF's format suffix override
+    as_ = serializers.ChoiceField(choices=FORMATS, default='markdown')
+    zip = serializers.BooleanField(default=False)
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        fields['as'] = fields.pop('as_')
+        return fields
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from playlists.models import Playlist, PlaylistItem
+from . import sync
+from .models import Note
+
+
+def note_playlist_id(note):
+    """Playlist a note counts towards: its item's playlist, else its own."""
+    if note.playlist_item_id:
+        if Note._meta.get_field('playlist_item').is_cached(note):
+            return note.playlist_item.playlist_id
+        return PlaylistItem.objects.filter(
+            id=note.playlist_item_id
+        ).values_list('playlist_id', flat=True).first()
+    return note.playlist_id
+
+
+@receiver(post_save, sender=Note)
+def count_created_note(sender, instance, created, **kwargs):
+    if created:
+        Playlist.objects.filter(id=note_playlist_id(instance)).adjust_counters(note_count=1)
+
+
+# pre_delete: when an item delete cascades, the item row is already gone by
+# the time the notes' post_delete fires, so resolve the playlist beforehand
+@receiver(pre_delete, sender=Note)
+def count_deleted_note(sender, instance, **kwargs):
+    Playlist.objects.filter(id=note_playlist_id(instance)).adjust_counters(note_count=-1)
+
+
+@receiver(post_save, sender=Note)
+def record_saved_note(sender, instance, **kwargs):
+    sync.record_change(instance.id, instance.user_id)
+
+
+@receiver(post_delete, sender=Note)
+def record_deleted_note(sender, instance, origin=None, **kwargs):
+    if origin is None or not sync.deleting_user(origin):
+        sync.record_change(instance.id, instance.user_id, deleted=True)
@@ -0,0 +1,48 @@
+"""
+Incremental notes sync.
+
+Every note write moves the note's single ``NoteChange`` row to a new,
+higher sequence number, and deleting a note turns that row into a
+tombstone. A client keeps the highest ``seq`` it has seen and asks for
+the changes after it, so catching up costs one indexed range read over
+the notes that changed rather than a download of the whole library.
+
+Sequence numbers come from the table's autoincrement key and are never
+reused. SQLite serializes writers, so they also become visible in order.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+
+from .models import Note, NoteChange
+
+
+def record_change(note_id, user_id, deleted=False):
+    """Move ``note_id`` to the end of its owner's changes feed."""
+    NoteChange.objects.filter(note_id=note_id).delete()
+    NoteChange.objects.create(note_id=note_id, user_id=user_id, is_deleted=deleted)
+
+
+def deleting_user(origin):
+    """Whether a delete cascades from a user, whose feed goes with them."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, get_user_model())
+
+
+def changes_since(user, since, limit):
+    """Up to ``limit`` changes after ``since`` and whether more follow.
+
+    Returns ``(changes, has_more)``; each change is ``(seq, note_id, note)``
+    with ``note`` None for deleted notes.
+    """
+    rows = list(NoteChange.objects.filter(
+        user=user,
+        seq__gt=since
+    ).order_by('seq').values_list('seq', 'note_id', 'is_deleted')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    notes = Note.objects.filter(user=user).in_bulk(
+        [note_id for _, note_id, is_deleted in rows if not is_deleted]
+    )
+    # A note deleted after the rows were read counts as deleted
+    return [(seq, note_id, notes.get(note_id)) for seq, note_id, _ in rows], has_more
@@ -0,0 +1,208 @@
+import io
+import json
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from capsules.models import KnowledgeCapsule
+from playlists.models import Playlist, PlaylistItem
+from .models import Note, NoteChange
+
+
+class NoteSyncTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='learner', email='learner@example.com', password='pass')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='pass')
+        self.playlist = Playlist.objects.create(creator=self.user, title='Course')
+        self.item = PlaylistItem.objects.create(
+            playlist=self.playlist, title='Lesson', url='https://example.com/lesson'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cache.clear()
+    
+    def pull(self, since=0, limit=500):
+        response = self.client.get('/api/notes/sync/', {'since': since, 'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def push(self, *operations):
+        response = self.client.post('/api/notes/sync/', {'operations': list(operations)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def create_note(self, **fields):
+        return Note.objects.create(user=self.user, content='Note', **fields)
+    
+    def test_changes_are_paged_by_cursor(self):
+        notes = [self.create_note(playlist_item=self.item, title=f'Note {index}') for index in range(5)]
+        
+        first = self.pull(limit=2)
+        self.assertEqual([change['id'] for change in first['changes']], [note.id for note in notes[:2]])
+        self.assertTrue(first['has_more'])
+        second = self.pull(since=first['cursor'], limit=2)
+        self.assertEqual([change['id'] for change in second['changes']], [note.id for note in notes[2:4]])
+        last = self.pull(since=second['cursor'], limit=2)
+        self.assertEqual([change['id'] for change in last['changes']], [notes[4].id])
+        self.assertFalse(last['has_more'])
+        
+        # An edit moves the note after everything already pulled
+        notes[0].content = 'Edited'
+        notes[0].save()
+        caught_up = self.pull(since=last['cursor'])
+        self.assertEqual([change['note']['content'] for change in caught_up['changes']], ['Edited'])
+        self.assertEqual(self.pull(since=caught_up['cursor'])['changes'], [])
+    
+    def test_deleted_note_leaves_a_tombstone(self):
+        note = self.create_note(playlist_item=self.item)
+        cursor = self.pull()['cursor']
+        
+        self.client.delete(f'/api/notes/{note.id}/')
+        
+        changes = self.pull(since=cursor)['changes']
+        self.assertEqual(
+            [(change['id'], change['deleted'], change['note']) for change in changes],
+            [(note.id, True, None)]
+        )
+    
+    def test_cascaded_deletes_leave_tombstones(self):
+        item_note = self.create_note(playlist_item=self.item)
+        playlist_note = self.create_note(playlist=self.playlist)
+        cursor = self.pull()['cursor']
+        
+        self.item.delete()
+        changes = self.pull(since=cursor)['changes']
+        self.assertEqual([(change['id'], change['deleted']) for change in changes], [(item_note.id, True)])
+        
+        self.playlist.delete()
+        changes = self.pull(since=changes[-1]['seq'])['changes']
+        self.assertEqual([(change['id'], change['deleted']) for change in changes], [(playlist_note.id, True)])
+    
+    def test_deleting_the_user_leaves_no_tombstones(self):
+        self.create_note(playlist_item=self.item)
+        self.create_note(playlist=self.playlist)
+        
+        self.user.delete()
+        
+        self.assertFalse(NoteChange.objects.exists())
+    
+    def test_stale_updated_at_is_a_conflict_with_the_server_copy(self):
+        note = self.create_note(playlist_item=self.item)
+        seen = note.updated_at
+        note.content = 'Edited elsewhere'
+        note.save()
+        
+        result = self.push({
+            'op': 'update', 'id': note.id, 'updated_at': seen.isoformat(), 'content': 'Mine'
+        })
+        
+        self.assertEqual((result['applied'], result['conflicts']), (0, 1))
+        self.assertEqual(result['results'][0]['status'], 'conflict')
+        self.assertEqual(result['results'][0]['note']['content'], 'Edited elsewhere')
+        note.refresh_from_db()
+        self.assertEqual(note.content, 'Edited elsewhere')
+    
+    def test_rejected_creates_do_not_abort_the_batch(self):
+        private = Playlist.objects.create(creator=self.other, title='Private')
+        note = self.create_note(playlist_item=self.item)
+        
+        result = self.push(
+            {'op': 'create', 'client_id': 'a', 'playlist_id': private.id, 'content': 'Forbidden'},
+            {'op': 'create', 'client_id': 'b', 'playlist_item_id': self.item.id + 100, 'content': 'Missing'},
+            {'op': 'create', 'client_id': 'c', 'playlist_item_id': self.item.id, 'content': 'Kept'},
+            {'op': 'update', 'id': note.id, 'updated_at': note.updated_at.isoformat(), 'content': 'Updated'},
+        )
+        
+        self.assertEqual(
+            [item['status'] for item in result['results']],
+            ['forbidden', 'not_found', 'applied', 'applied']
+        )
+        self.assertEqual(result['applied'], 2)
+        self.assertEqual(
+            sorted(Note.objects.filter(user=self.user).values_list('content', flat=True)),
+            ['Kept', 'Updated']
+        )
+        self.assertFalse(Note.objects.filter(playlist=private).exists())
+
+
+class NoteExportTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='learner', email='learner@example.com', password='pass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        
+        course = Playlist.objects.create(creator=self.user, title='Course')
+        # Created out of display order, on fractional keys from moves
+        second = self.item(course, 'Second', 1.5)
+        first = self.item(course, 'First', 0.75)
+        third = self.item(course, 'Third', 1.625)
+        other = Playlist.objects.create(creator=self.user, title='Other')
+        other_item = self.item(other, 'Only', 0.5)
+        
+        self.note('Late', playlist_item=second, timestamp_seconds=90)
+        self.note('Early', playlist_item=second, timestamp_seconds=30)
+        self.note('Intro', playlist_item=first)
+        self.note('Overview', playlist=course)
+        self.note('Elsewhere', playlist_item=other_item)
+        self.note('Loose')
+        self.capsule(first, 'First summary')
+        self.capsule(third, 'Third summary')
+    
+    def item(self, playlist, title, order):
+        return PlaylistItem.objects.create(
+            playlist=playlist, title=title, url='https://example.com/item', order=order
+        )
+    
+    def note(self, title, **fields):
+        Note.objects.create(user=self.user, title=title, content=f'{title} content', **fields)
+    
+    def capsule(self, playlist_item, summary):
+        KnowledgeCapsule.objects.create(
+            user=self.user, playlist_item=playlist_item, summary=summary, key_points=['One']
+        )
+    
+    def export(self, **params):
+        response = self.client.get('/api/notes/export/', {'as': 'json', **params})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+    
+    def assert_grouping(self, document):
+        grouping = [
+            (
+                playlist['title'],
+                [note['title'] for note in playlist['notes']],
+                [
+                    (
+                        item['title'],
+                        [note['title'] for note in item['notes']],
+                        item['capsule'] and item['capsule']['summary'],
+                    )
+                    for item in playlist['items']
+                ],
+            )
+            for playlist in document['playlists']
+        ]
+        self.assertEqual(grouping, [
+            ('Course', ['Overview'], [
+                ('First', ['Intro'], 'First summary'),
+                ('Second', ['Early', 'Late'], None),
+                ('Third', [], 'Third summary'),
+            ]),
+            ('Other', [], [('Only', ['Elsewhere'], None)]),
+            (None, ['Loose'], []),
+        ])
+    
+    def test_json_export_parses_into_playlist_and_item_groups(self):
+        self.assert_grouping(json.loads(self.export()))
+    
+    def test_zipped_json_export_parses_into_the_same_groups(self):
+        with zipfile.ZipFile(io.BytesIO(self.export(zip='true'))) as archive:
+            name, = archive.namelist()
+            self.assertTrue(name.endswith('.json'))
+            self.assert_grouping(json.loads(archive.read(name)))
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import NoteListCreateView, NoteDetailView, ItemNotesView
+from .views import NoteListCreateView, NoteDetailView, NoteSyncView, NoteExportView, ItemNotesView
 
 urlpatterns = [
     path('', NoteListCreateView.as_view(), name='note_list_create'),
     path('<int:pk>/', NoteDetailView.as_view(), name='note_detail'),
+    path('sync/', NoteSyncView.as_view(), name='note_sync'),
+    path('export/', NoteExportView.as_view(), name='note_export'),
     path('item/<int:item_id>/', ItemNotesView.as_view(), name='item_notes'),
 ]
@@ -1,9 +1,22 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
+from . import export, sync
 from .models import Note
-from .serializers import NoteSerializer, NoteCreateUpdateSerializer
+from .serializers import (
+    NoteSerializer,
+    NoteCreateUpdateSerializer,
+    NoteWindowQuerySerializer,
+    NoteSyncQuerySerializer,
+    NoteSyncPushSerializer,
+    NoteExportQuerySerializer,
+)
+from playlists import access
 from playlists.models import PlaylistItem, Playlist
 
 
@@ -41,12 +54,14 @@ class NoteListCreateView(generics.ListCreateAPIView):
         
         if data.get('playlist_item_id'):
             playlist_item = get_object_or_404(
-                PlaylistItem, 
+                PlaylistItem.objects.select_related('playlist'), 
                 id=data['playlist_item_id']
             )
+            access.require_view(request, playlist_item.playlist)
         
         if data.get('playlist_id'):
             playlist = get_object_or_404(Playlist, id=data['playlist_id'])
+            access.require_view(request, playlist)
         
         note = Note.objects.create(
             user=request.user,
@@ -87,8 +102,169 @@ class NoteDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Response(NoteSerializer(note).data)
 
 
+class NoteSyncView(APIView):
+    """Incremental sync of the user's notes for offline-first clients.
+    
+    GET returns the changes after ``?since=`` (a ``seq`` from an earlier
+    response, 0 for everything) oldest first, with the full note for
+    changed notes and a tombstone for deleted ones. Keep calling with the
+    returned ``cursor`` while ``has_more`` is true.
+    
+    POST applies a batch of create, update and delete operations in one
+    transaction. Updates and deletes only apply while the note's
+    ``updated_at`` still matches the one sent; otherwise the result is a
+    conflict carrying the server's copy. Pull again afterwards: the
+    client's own writes come back through the feed like any other change.
+    """
+    
+    UPDATABLE_FIELDS = ('title', 'content', 'timestamp_seconds')
+    
+    def get(self, request):
+        query = NoteSyncQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        since = query.validated_data['since']
+        
+        changes, has_more = sync.changes_since(
+            request.user, since, query.validated_data['limit']
+        )
+        
+        return Response({
+            'changes': [
+                {
+                    'seq': seq,
+                    'id': note_id,
+                    'deleted': note is None,
+                    'note': NoteSerializer(note).data if note is not None else None
+                }
+                for seq, note_id, note in changes
+            ],
+            'cursor': changes[-1][0] if changes else since,
+            'has_more': has_more
+        })
+    
+    def post(self, request):
+        data = request.data
+        if isinstance(data, list):
+            data = {'operations': data}
+        serializer = NoteSyncPushSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data['operations']
+        
+        creates = [operation for operation in operations if operation['op'] == 'create']
+        items = PlaylistItem.objects.select_related('playlist').in_bulk(
+            {operation['playlist_item_id'] for operation in creates if operation.get('playlist_item_id')}
+        )
+        playlists = Playlist.objects.in_bulk(
+            {operation['playlist_id'] for operation in creates if operation.get('playlist_id')}
+        )
+        
+        results = []
+        with transaction.atomic():
+            notes = Note.objects.select_for_update().filter(user=request.user).in_bulk(
+                {operation['id'] for operation in operations if operation['op'] != 'create'}
+            )
+            for operation in operations:
+                if operation['op'] == 'create':
+                    result = self.create_note(request, operation, items, playlists)
+                else:
+                    result = self.change_note(operation, notes)
+                results.append(result)
+        
+        return Response({
+            'applied': sum(result['status'] == 'applied' for result in results),
+            'conflicts': sum(result['status'] == 'conflict' for result in results),
+            'results': results
+        })
+    
+    def create_note(self, request, operation, items, playlists):
+        result = {'op': 'create', 'client_id': operation.get('client_id')}
+        
+        playlist_item = playlist = None
+        if operation.get('playlist_item_id'):
+            playlist_item = items.get(operation['playlist_item_id'])
+            if playlist_item is None:
+                return {**result, 'status': 'not_found'}
+            if not access.can_view(request, playlist_item.playlist):
+                return {**result, 'status': 'forbidden'}
+        if operation.get('playlist_id'):
+            playlist = playlists.get(operation['playlist_id'])
+            if playlist is None:
+                return {**result, 'status': 'not_found'}
+            if not access.can_view(request, playlist):
+                return {**result, 'status': 'forbidden'}
+        
+        note = Note.objects.create(
+            user=request.user,
+            playlist_item=playlist_item,
+            playlist=playlist,
+            title=operation.get('title', ''),
+            content=operation['content'],
+            timestamp_seconds=operation.get('timestamp_seconds')
+        )
+        return {**result, 'status': 'applied', 'id': note.id, 'note': NoteSerializer(note).data}
+    
+    def change_note(self, operation, notes):
+        result = {'op': operation['op'], 'id': operation['id']}
+        
+        note = notes.get(operation['id'])
+        if note is None:
+            return {**result, 'status': 'not_found'}
+        if note.updated_at != operation['updated_at']:
+            return {**result, 'status': 'conflict', 'note': NoteSerializer(note).data}
+        
+        if operation['op'] == 'delete':
+            note.delete()
+            del notes[operation['id']]
+            return {**result, 'status': 'applied'}
+        
+        for field in self.UPDATABLE_FIELDS:
+            if field in operation:
+                setattr(note, field, operation[field])
+        note.save()
+        return {**result, 'status': 'applied', 'note': NoteSerializer(note).data}
+
+
+class NoteExportView(APIView):
+    """Download all of the user's notes and knowledge capsules.
+    
+    ``?as=markdown`` (default) or ``?as=json``, grouped by playlist and
+    item; ``?zip=true`` wraps the file in a zip archive. The file is
+    streamed as it is written, so memory use does not grow with the size
+    of the library.
+    """
+    
+    CONTENT_TYPES = {'markdown': 'text/markdown; charset=utf-8', 'json': 'application/json'}
+    
+    def get(self, request):
+        query = NoteExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        output_format = query.validated_data['as']
+        
+        filename = f"eduflex-notes-{timezone.now():%Y%m%d}.{export.EXTENSIONS[output_format]}"
+        chunks = export.buffered(export.WRITERS[output_format](request.user))
+        if query.validated_data['zip']:
+            response = StreamingHttpResponse(
+                export.zipped(chunks, filename),
+                content_type='application/zip'
+            )
+            filename += '.zip'
+        else:
+            response = StreamingHttpResponse(
+                (chunk.encode() for chunk in chunks),
+                content_type=self.CONTENT_TYPES[output_format]
+            )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 class ItemNotesView(generics.ListAPIView):
-    """Get all notes for a specific playlist item."""
+    """Get the notes for a specific playlist item in video order.
+    
+    ``?from=&to=`` (seconds, inclusive, either bound optional) narrows the
+    list to a window of the video. ``?near=t&limit=N`` returns the N notes
+    closest to ``t`` unpaginated, for showing notes around the playhead.
+    Both skip notes without a timestamp.
+    """
     
     serializer_class = NoteSerializer
     
@@ -98,3 +274,42 @@ class ItemNotesView(generics.ListAPIView):
             user=self.request.user,
             playlist_item_id=item_id
         ).order_by('timestamp_seconds', 'created_at')
+    
+    def list(self, request, *args, **kwargs):
+        query = NoteWindowQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        
+        if 'near' in params:
+            notes = self.nearest(params['near'], params['limit'])
+            return Response({
+                'near': params['near'],
+                'results': NoteSerializer(notes, many=True).data
+            })
+        
+        queryset = self.get_queryset()
+        if params.get('from') is not None:
+            queryset = queryset.filter(timestamp_seconds__gte=params['from'])
+        if params.get('to') is not None:
+            queryset = queryset.filter(timestamp_seconds__lte=params['to'])
+        
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(NoteSerializer(page, many=True).data)
+    
+    def nearest(self, seconds, limit):
+        """The ``limit`` notes closest to ``seconds``, in video order.
+        
+        Reads at most ``limit`` notes on each side of ``seconds`` off the
+        timestamp index instead of ranking every note of the item.
+        """
+        queryset = self.get_queryset()
+        after = list(queryset.filter(timestamp_seconds__gte=seconds)[:limit])
+        before = list(queryset.filter(
+            timestamp_seconds__lt=seconds
+        ).order_by('-timestamp_seconds', '-created_at')[:limit])
+        
+        closest = sorted(
+            before + after,
+            key=lambda note: abs(note.timestamp_seconds - seconds)
+        )[:limit]
+        return sorted(closest, key=lambda note: (note.timestamp_seconds, note.created_at))
@@ -0,0 +1,74 @@
+"""
+Playlist access resolution.
+
+A user's effective permission on a playlist is ``owner``, ``edit``,
+``view`` or ``None``. Ownership and public visibility come from the
+playlist row itself; collaborator permissions are looked up once per
+request and shared across requests through the cache. Cache keys include
+``Playlist.version``, which every ``PlaylistCollaborator`` change bumps,
+so a revoked permission is never read back from any process's cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import PermissionDenied
+
+OWNER = 'owner'
+EDIT = 'edit'
+VIEW = 'view'
+
+# Cached marker for "not a collaborator", distinct from a cache miss
+NO_ACCESS = ''
+
+
+def _cache_key(playlist, user_id):
+    return f'playlist-access:{playlist.id}:{playlist.version}:{user_id}'
+
+
+def _collaborator_permission(request, playlist):
+    memo = getattr(request, '_playlist_access', None)
+    if memo is None:
+        memo = request._playlist_access = {}
+    
+    if playlist.id not in memo:
+        key = _cache_key(playlist, request.user.id)
+        permission = cache.get(key)
+        if permission is None:
+            from .models import PlaylistCollaborator
+            permission = PlaylistCollaborator.objects.filter(
+                playlist_id=playlist.id,
+                user_id=request.user.id
+            ).values_list('permission', flat=True).first() or NO_ACCESS
+            cache.set(key, permission, settings.PLAYLIST_ACCESS_CACHE_TIMEOUT)
+        memo[playlist.id] = permission
+    return memo[playlist.id]
+
+
+def get_permission(request, playlist):
+    """Effective permission of the requesting user on ``playlist``."""
+    user = request.user
+    if not user.is_authenticated:
+        return VIEW if playlist.is_public else None
+    if playlist.creator_id == user.id:
+        return OWNER
+    
+    permission = _collaborator_permission(request, playlist)
+    if permission == EDIT:
+        return EDIT
+    if permission == VIEW or playlist.is_public:
+        return VIEW
+    return None
+
+
+def can_view(request, playlist):
+    return get_permission(request, playlist) is not None
+
+
+def can_edit(request, playlist):
+    return get_permission(request, playlist) in (OWNER, EDIT)
+
+
+def require_view(request, playlist):
+    """Raise ``PermissionDenied`` unless the user can see the playlist."""
+    if not can_view(request, playlist):
+        raise PermissionDenied('You do not have access to this playlist.')
+
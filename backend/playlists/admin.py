@@ -12,6 +12,8 @@ class PlaylistAdmin(admin.ModelAdmin):
     list_display = ['title', 'creator', 'is_public', 'item_count', 'created_at']
     list_filter = ['is_public', 'created_at']
     search_fields = ['title', 'creator__email']
+    list_select_related = ['creator']
+    readonly_fields = Playlist.MAINTAINED_FIELDS
     inlines = [PlaylistItemInline]
 
 
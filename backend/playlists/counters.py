@@ -0,0 +1,76 @@
+"""
+Recompute the denormalized playlist counters from the child tables.
+
+Used by the ``reconcile_playlist_counters`` command. Migration 0007 keeps
+its own copy of the aggregation so it does not depend on this module.
+"""
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+
+COUNTER_FIELDS = (
+    'item_count',
+    'total_duration_minutes',
+    'collaborator_count',
+    'discussion_count',
+    'note_count',
+)
+
+
+def expected_counters(PlaylistItem, PlaylistCollaborator, Discussion, Note):
+    """Map playlist id to its true counter values using grouped queries."""
+    expected = {}
+
+    def merge(rows, **fields):
+        for row in rows:
+            counters = expected.setdefault(row['group_id'], {})
+            for field, key in fields.items():
+                counters[field] = row[key] or 0
+
+    merge(
+        PlaylistItem.objects.order_by().values(group_id=F('playlist_id')).annotate(
+            count=Count('id'), duration=Sum('duration_minutes')
+        ),
+        item_count='count', total_duration_minutes='duration',
+    )
+    merge(
+        PlaylistCollaborator.objects.order_by().values(group_id=F('playlist_id')).annotate(
+            count=Count('id')
+        ),
+        collaborator_count='count',
+    )
+    merge(
+        Discussion.objects.order_by().values(group_id=F('playlist_id')).annotate(
+            count=Count('id')
+        ),
+        discussion_count='count',
+    )
+    # A note counts towards its item's playlist, else its own playlist
+    merge(
+        Note.objects.order_by().values(
+            group_id=Coalesce('playlist_item__playlist_id', 'playlist_id')
+        ).exclude(group_id=None).annotate(count=Count('id')),
+        note_count='count',
+    )
+    return expected
+
+
+def reconcile(Playlist, PlaylistItem, PlaylistCollaborator, Discussion, Note,
+              dry_run=False, batch_size=500):
+    """Repair drifted counters; returns the number of playlists fixed."""
+    expected = expected_counters(PlaylistItem, PlaylistCollaborator, Discussion, Note)
+
+    drifted = []
+    for playlist in Playlist.objects.only('id', *COUNTER_FIELDS).iterator(chunk_size=batch_size):
+        counters = expected.get(playlist.id, {})
+        changed = False
+        for field in COUNTER_FIELDS:
+            value = counters.get(field, 0)
+            if getattr(playlist, field) != value:
+                setattr(playlist, field, value)
+                changed = True
+        if changed:
+            drifted.append(playlist)
+
+    if drifted and not dry_run:
+        Playlist.objects.bulk_update(drifted, COUNTER_FIELDS, batch_size=batch_size)
+    return len(drifted)
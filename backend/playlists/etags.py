@@ -0,0 +1,45 @@
+"""
+Strong ETags for playlist and item detail reads.
+
+A playlist's representation changes when the playlist row is saved
+(``updated_at``) or when its items or collaborators change (``version``,
+bumped by signal handlers and by the bulk write paths). The query string
+is part of the tag because it can change the representation.
+"""
+import hashlib
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _etag(*parts):
+    digest = hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def playlist_etag(playlist, request):
+    return _etag(
+        'playlist', playlist.id, playlist.version,
+        playlist.updated_at.isoformat(), request.META.get('QUERY_STRING', '')
+    )
+
+
+def item_etag(item, request):
+    return _etag(
+        'item', item.id, item.playlist.version,
+        item.playlist.updated_at.isoformat(), request.META.get('QUERY_STRING', '')
+    )
+
+
+def is_current(request, etag):
+    """True when the client's ``If-None-Match`` already covers ``etag``."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    tags = parse_etags(header)
+    return '*' in tags or etag in tags
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
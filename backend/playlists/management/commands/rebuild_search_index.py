@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from playlists import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the playlist full-text search index.'
+    
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Full-text search requires SQLite with FTS5 and the search index migration.')
+        
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} playlists.'))
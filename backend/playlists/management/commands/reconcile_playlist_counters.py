@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from comments.models import Discussion
+from notes.models import Note
+from playlists import counters
+from playlists.models import Playlist, PlaylistItem, PlaylistCollaborator
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized playlist counters and repair any drift.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drifted playlists without writing'
+        )
+    
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = counters.reconcile(
+                Playlist, PlaylistItem, PlaylistCollaborator, Discussion, Note,
+                dry_run=options['dry_run'],
+            )
+        
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {fixed} playlists with drifted counters.'))
@@ -0,0 +1,39 @@
+from django.db import OperationalError, migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS playlists_search "
+            "USING fts5(title, description, item_titles, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5; search falls back to icontains
+        return
+    schema_editor.execute(
+        "INSERT INTO playlists_search (rowid, title, description, item_titles) "
+        "SELECT p.id, p.title, p.description, "
+        "COALESCE((SELECT group_concat(i.title, ' | ') "
+        "FROM playlists_playlistitem i WHERE i.playlist_id = p.id), '') "
+        "FROM playlists_playlist p"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS playlists_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
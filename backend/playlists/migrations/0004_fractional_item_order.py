@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:01
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def spread_order_keys(apps, schema_editor):
+    PlaylistItem = apps.get_model('playlists', 'PlaylistItem')
+    PlaylistItem.objects.update(order=F('order') * 1024.0)
+
+
+def compact_order_keys(apps, schema_editor):
+    # Moves leave fractional keys, so renumber each playlist 0, 1, 2, ...
+    # in its current order rather than scaling the keys back down
+    PlaylistItem = apps.get_model('playlists', 'PlaylistItem')
+    items = []
+    position = playlist_id = None
+    for item in PlaylistItem.objects.order_by('playlist_id', 'order', 'id').only(
+        'id', 'playlist_id', 'order'
+    ).iterator():
+        position = 0 if item.playlist_id != playlist_id else position + 1
+        playlist_id = item.playlist_id
+        item.order = position
+        items.append(item)
+    PlaylistItem.objects.bulk_update(items, ['order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0003_playlist_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='playlistitem',
+            options={'ordering': ['order', 'id']},
+        ),
+        migrations.AlterField(
+            model_name='playlistitem',
+            name='order',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='playlistitem',
+            index=models.Index(fields=['playlist', 'order'], name='playlist_item_order_idx'),
+        ),
+        migrations.RunPython(spread_order_keys, compact_order_keys),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+
+COUNTER_FIELDS = (
+    'item_count',
+    'total_duration_minutes',
+    'collaborator_count',
+    'discussion_count',
+    'note_count',
+)
+
+
+def populate_counters(apps, schema_editor):
+    # Self-contained copy of the aggregation in playlists.counters, so later
+    # changes to that module cannot break migrating a fresh database
+    Playlist = apps.get_model('playlists', 'Playlist')
+    PlaylistItem = apps.get_model('playlists', 'PlaylistItem')
+    PlaylistCollaborator = apps.get_model('playlists', 'PlaylistCollaborator')
+    Discussion = apps.get_model('comments', 'Discussion')
+    Note = apps.get_model('notes', 'Note')
+    
+    counters = {}
+    
+    def merge(rows, **fields):
+        for row in rows:
+            values = counters.setdefault(row['group_id'], {})
+            for field, key in fields.items():
+                values[field] = row[key] or 0
+    
+    merge(
+        PlaylistItem.objects.order_by().values(group_id=F('playlist_id')).annotate(
+            count=Count('id'), duration=Sum('duration_minutes')
+        ),
+        item_count='count', total_duration_minutes='duration',
+    )
+    merge(
+        PlaylistCollaborator.objects.order_by().values(group_id=F('playlist_id')).annotate(
+            count=Count('id')
+        ),
+        collaborator_count='count',
+    )
+    merge(
+        Discussion.objects.order_by().values(group_id=F('playlist_id')).annotate(
+            count=Count('id')
+        ),
+        discussion_count='count',
+    )
+    merge(
+        Note.objects.order_by().values(
+            group_id=Coalesce('playlist_item__playlist_id', 'playlist_id')
+        ).exclude(group_id=None).annotate(count=Count('id')),
+        note_count='count',
+    )
+    
+    # The columns were just added with a default of 0
+    playlists = []
+    for playlist in Playlist.objects.filter(id__in=list(counters)).only('id').iterator():
+        for field in COUNTER_FIELDS:
+            setattr(playlist, field, counters[playlist.id].get(field, 0))
+        playlists.append(playlist)
+    Playlist.objects.bulk_update(playlists, COUNTER_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_keyset_pagination_indexes'),
+        ('notes', '0003_initial'),
+        ('playlists', '0006_playlist_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='collaborator_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='discussion_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='note_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='total_duration_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='playlist',
+            index=models.Index(fields=['is_public', '-total_duration_minutes', 'id'], name='playlist_public_longest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playlist',
+            index=models.Index(fields=['is_public', '-discussion_count', 'id'], name='playlist_public_discussed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playlist',
+            index=models.Index(fields=['is_public', '-item_count', 'id'], name='playlist_public_items_idx'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
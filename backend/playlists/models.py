@@ -1,7 +1,43 @@
 from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
 from django.conf import settings
 
 
+class PlaylistQuerySet(models.QuerySet):
+    """Query helpers shared by the playlist views."""
+    
+    def accessible_to(self, user):
+        """Playlists the user owns or collaborates on.
+        
+        Collaboration is resolved through a subquery rather than a join so
+        the result needs no ``distinct()`` and aggregates stay correct.
+        """
+        shared = PlaylistCollaborator.objects.filter(user=user).values('playlist_id')
+        return self.filter(Q(creator=user) | Q(id__in=shared))
+    
+    @staticmethod
+    def _counter_updates(deltas):
+        # Clamped at zero so drift never violates the column constraint;
+        # reconcile_playlist_counters repairs any drift.
+        return {
+            field: Greatest(F(field) + delta, Value(0))
+            for field, delta in deltas.items() if delta
+        }
+    
+    def adjust_counters(self, **deltas):
+        """Apply deltas to the denormalized counters in a single UPDATE."""
+        updates = self._counter_updates(deltas)
+        return self.update(**updates) if updates else 0
+    
+    def bump_version(self, **deltas):
+        """Mark items or collaborators of these playlists as changed.
+        
+        Counter deltas, if any, are applied in the same UPDATE.
+        """
+        return self.update(version=F('version') + 1, **self._counter_updates(deltas))
+
+
 class Playlist(models.Model):
     """Playlist containing learning resources."""
     
@@ -14,22 +50,51 @@ class Playlist(models.Model):
     description = models.TextField(blank=True)
     cover_image = models.ImageField(upload_to='playlist_covers/', null=True, blank=True)
     is_public = models.BooleanField(default=False)
+    # Bumped whenever items or collaborators change; see playlists.etags
+    version = models.PositiveIntegerField(default=1, editable=False)
+    
+    # Denormalized counters, maintained by signal handlers with F() updates.
+    # Not editable, and left out of saves of an existing playlist; see save().
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+    total_duration_minutes = models.PositiveIntegerField(default=0, editable=False)
+    collaborator_count = models.PositiveIntegerField(default=0, editable=False)
+    discussion_count = models.PositiveIntegerField(default=0, editable=False)
+    note_count = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = PlaylistQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Keyset pagination of Discover
+            models.Index(fields=['is_public', '-updated_at', 'id'], name='playlist_public_recent_idx'),
+            # Discover sort orders
+            models.Index(fields=['is_public', '-total_duration_minutes', 'id'], name='playlist_public_longest_idx'),
+            models.Index(fields=['is_public', '-discussion_count', 'id'], name='playlist_public_discussed_idx'),
+            models.Index(fields=['is_public', '-item_count', 'id'], name='playlist_public_items_idx'),
+        ]
+    
+    # Only ever changed by F() updates in PlaylistQuerySet
+    MAINTAINED_FIELDS = (
+        'version', 'item_count', 'total_duration_minutes',
+        'collaborator_count', 'discussion_count', 'note_count',
+    )
     
     def __str__(self):
         return self.title
     
-    @property
-    def item_count(self):
-        return self.items.count()
-    
-    @property
-    def total_duration(self):
-        return sum(item.duration_minutes or 0 for item in self.items.all())
+    def save(self, *args, **kwargs):
+        # Saving a loaded playlist must not write back the counters as they
+        # were when it was loaded, undoing concurrent F() updates
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 
 class PlaylistItem(models.Model):
@@ -52,11 +117,15 @@ class PlaylistItem(models.Model):
     description = models.TextField(blank=True)
     thumbnail = models.URLField(blank=True)
     duration_minutes = models.PositiveIntegerField(null=True, blank=True)
-    order = models.PositiveIntegerField(default=0)
+    # Sparse fractional key, see playlists.ordering
+    order = models.FloatField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        ordering = ['order']
+        ordering = ['order', 'id']
+        indexes = [
+            models.Index(fields=['playlist', 'order'], name='playlist_item_order_idx'),
+        ]
     
     def __str__(self):
         return f"{self.playlist.title} - {self.title}"
@@ -0,0 +1,56 @@
+"""
+Sparse fractional order keys for playlist items.
+
+Items are spaced ``ORDER_STEP`` apart so that moving an item only needs a
+key between its new neighbours, i.e. a single-row write. Repeated moves
+into the same slot halve the gap each time; once it drops below
+``MIN_GAP`` the move rebalances the playlist back to evenly spaced keys
+in the same transaction, with the playlist's items locked.
+"""
+from django.db import transaction
+from django.db.models import Max
+
+ORDER_STEP = 1024.0
+MIN_GAP = 1e-6
+
+
+def next_order(playlist):
+    """Order key that places a new item after the current last item."""
+    last = playlist.items.aggregate(last=Max('order'))['last']
+    return 0.0 if last is None else last + ORDER_STEP
+
+
+def order_between(lower, upper):
+    """Key strictly between two neighbouring keys (either may be None)."""
+    if lower is None and upper is None:
+        return 0.0
+    if lower is None:
+        return upper - ORDER_STEP
+    if upper is None:
+        return lower + ORDER_STEP
+    return (lower + upper) / 2
+
+
+def needs_rebalance(lower, upper):
+    return lower is not None and upper is not None and upper - lower < 2 * MIN_GAP
+
+
+def rebalance(playlist_id):
+    """Respace every item of a playlist ``ORDER_STEP`` apart."""
+    from .models import Playlist, PlaylistItem
+    
+    with transaction.atomic():
+        # Serialise with concurrent moves, which lock the same row
+        Playlist.objects.select_for_update().filter(id=playlist_id).exists()
+        items = list(
+            PlaylistItem.objects.select_for_update()
+            .filter(playlist_id=playlist_id)
+            .order_by('order', 'id')
+            .only('id', 'order')
+        )
+        for index, item in enumerate(items):
+            item.order = index * ORDER_STEP
+        PlaylistItem.objects.bulk_update(items, ['order'])
+        Playlist.objects.filter(id=playlist_id).bump_version()
+    return len(items)
+
@@ -0,0 +1,153 @@
+"""
+Full-text search over playlists.
+
+Playlist titles, descriptions and item titles are kept in an SQLite FTS5
+table keyed by playlist id. Rows are refreshed from signal handlers
+whenever a playlist or one of its items changes, and queries return
+playlists ranked with BM25 together with highlighted snippets.
+"""
+import re
+from dataclasses import dataclass
+
+from django.db import OperationalError, connection
+
+INDEX_TABLE = 'playlists_search'
+
+# Maximum number of ranked hits returned for a single query.
+MAX_RESULTS = 200
+
+# Relative BM25 weights for the title, description and item title columns.
+COLUMN_WEIGHTS = (10.0, 4.0, 2.0)
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+@dataclass
+class SearchHit:
+    """A ranked search result for one playlist."""
+
+    playlist_id: int
+    score: float
+    title: str
+    description: str
+    items: str
+
+    @property
+    def highlights(self):
+        return {
+            'title': self.title,
+            'description': self.description,
+            'items': self.items,
+        }
+
+
+# Probe results per database alias; SQLite's modules do not change at runtime
+_available = {}
+
+
+def is_available():
+    """Whether the FTS5 index can be queried.
+
+    Needs SQLite built with FTS5 and the index table created by migration
+    0003, which skips it when FTS5 is missing. Probed once per process.
+    """
+    if connection.alias not in _available:
+        _available[connection.alias] = connection.vendor == 'sqlite' and _probe()
+    return _available[connection.alias]
+
+
+def _probe():
+    # Fails with "no such module: fts5" or "no such table" when unusable
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {INDEX_TABLE} LIMIT 0')
+    except OperationalError:
+        return False
+    return True
+
+
+def _tables():
+    from .models import Playlist, PlaylistItem
+    return Playlist._meta.db_table, PlaylistItem._meta.db_table
+
+
+def _populate_sql(where):
+    playlist_table, item_table = _tables()
+    return f"""
+        INSERT INTO {INDEX_TABLE} (rowid, title, description, item_titles)
+        SELECT p.id, p.title, p.description,
+               COALESCE((SELECT group_concat(i.title, ' | ')
+                         FROM {item_table} i
+                         WHERE i.playlist_id = p.id), '')
+        FROM {playlist_table} p
+        {where}
+    """
+
+
+def index_playlist(playlist_id):
+    """Refresh the index row for a single playlist."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [playlist_id])
+        cursor.execute(_populate_sql('WHERE p.id = %s'), [playlist_id])
+
+
+def remove_playlist(playlist_id):
+    """Drop a playlist from the index."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [playlist_id])
+
+
+def rebuild_index():
+    """Rebuild the whole index from the playlist tables.
+
+    Returns the number of indexed playlists.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+        cursor.execute(_populate_sql(''))
+        cursor.execute(f'SELECT COUNT(*) FROM {INDEX_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query.
+
+    Every word becomes a quoted prefix term so user input can never be
+    interpreted as FTS5 syntax; all terms must match.
+    """
+    tokens = _TOKEN_RE.findall(text)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search(text, public_only=True, limit=MAX_RESULTS):
+    """Return BM25-ranked ``SearchHit``s for ``text``, best match first."""
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    playlist_table, _ = _tables()
+    weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+    marks = f"'{HIGHLIGHT_START}', '{HIGHLIGHT_END}'"
+    sql = f"""
+        SELECT {INDEX_TABLE}.rowid,
+               bm25({INDEX_TABLE}, {weights}) AS score,
+               highlight({INDEX_TABLE}, 0, {marks}),
+               snippet({INDEX_TABLE}, 1, {marks}, '...', 24),
+               snippet({INDEX_TABLE}, 2, {marks}, '...', 16)
+        FROM {INDEX_TABLE}
+        JOIN {playlist_table} p ON p.id = {INDEX_TABLE}.rowid
+        WHERE {INDEX_TABLE} MATCH %s
+        {'AND p.is_public = 1' if public_only else ''}
+        ORDER BY score
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, limit])
+        return [SearchHit(*row) for row in cursor.fetchall()]
@@ -1,9 +1,10 @@
 from rest_framework import serializers
 from .models import Playlist, PlaylistItem, PlaylistCollaborator
+from eduflex.serializers import DynamicFieldsMixin
 from users.serializers import UserSerializer
 
 
-class PlaylistItemSerializer(serializers.ModelSerializer):
+class PlaylistItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for playlist items."""
     
     class Meta:
@@ -13,6 +14,38 @@ class PlaylistItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class MoveItemSerializer(serializers.Serializer):
+    """Serializer for moving one item between two neighbours."""
+    
+    after_id = serializers.IntegerField(
+        required=False, allow_null=True,
+        help_text="Item that should come directly before the moved item"
+    )
+    before_id = serializers.IntegerField(
+        required=False, allow_null=True,
+        help_text="Item that should come directly after the moved item"
+    )
+    
+    def validate(self, attrs):
+        if attrs.get('after_id') is None and attrs.get('before_id') is None:
+            raise serializers.ValidationError('Provide after_id, before_id or both.')
+        return attrs
+
+
+class ForkPlaylistSerializer(serializers.Serializer):
+    """Serializer for the options of a playlist fork."""
+    
+    title = serializers.CharField(
+        max_length=200, required=False,
+        help_text="Title of the copy; defaults to the source title"
+    )
+    is_public = serializers.BooleanField(default=False)
+    copy_cover = serializers.BooleanField(
+        default=True,
+        help_text="Share the source cover image file instead of leaving the copy without one"
+    )
+
+
 class PlaylistCollaboratorSerializer(serializers.ModelSerializer):
     """Serializer for playlist collaborators."""
     
@@ -25,13 +58,13 @@ class PlaylistCollaboratorSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class PlaylistSerializer(serializers.ModelSerializer):
+class PlaylistSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for playlists."""
     
     creator = UserSerializer(read_only=True)
     items = PlaylistItemSerializer(many=True, read_only=True)
     item_count = serializers.IntegerField(read_only=True)
-    total_duration = serializers.IntegerField(read_only=True)
+    total_duration = serializers.IntegerField(source='total_duration_minutes', read_only=True)
     
     class Meta:
         model = Playlist
@@ -39,20 +72,47 @@ class PlaylistSerializer(serializers.ModelSerializer):
                   'is_public', 'items', 'item_count', 'total_duration', 
                   'created_at', 'updated_at']
         read_only_fields = ['id', 'creator', 'created_at', 'updated_at']
+        expandable_fields = {'creator': 'pk', 'items': None}
+        select_related_fields = {'creator': 'creator'}
+        prefetch_related_fields = {'items': 'items'}
+    
+    def update(self, instance, validated_data):
+        # Write only the edited columns; a full save would overwrite counter
+        # and version updates made by concurrent requests with stale values
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
 
 
-class PlaylistListSerializer(serializers.ModelSerializer):
+class PlaylistListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Lightweight serializer for playlist lists."""
     
     creator = UserSerializer(read_only=True)
     item_count = serializers.IntegerField(read_only=True)
-    total_duration = serializers.IntegerField(read_only=True)
+    total_duration = serializers.IntegerField(source='total_duration_minutes', read_only=True)
     
     class Meta:
         model = Playlist
         fields = ['id', 'creator', 'title', 'description', 'cover_image',
-                  'is_public', 'item_count', 'total_duration', 'created_at']
-        read_only_fields = ['id', 'creator', 'created_at']
+                  'is_public', 'item_count', 'total_duration', 'collaborator_count',
+                  'discussion_count', 'note_count', 'created_at']
+        read_only_fields = ['id', 'creator', 'collaborator_count', 'discussion_count',
+                            'note_count', 'created_at']
+        expandable_fields = {'creator': 'pk'}
+        select_related_fields = {'creator': 'creator'}
+
+
+class PlaylistSearchResultSerializer(PlaylistListSerializer):
+    """Playlist list entry with highlighted full-text search snippets."""
+    
+    highlights = serializers.SerializerMethodField()
+    
+    class Meta(PlaylistListSerializer.Meta):
+        fields = PlaylistListSerializer.Meta.fields + ['highlights']
+    
+    def get_highlights(self, obj):
+        return self.context.get('search_highlights', {}).get(obj.id)
 
 
 class ReorderItemsSerializer(serializers.Serializer):
@@ -0,0 +1,76 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import search
+from .models import Playlist, PlaylistItem, PlaylistCollaborator
+
+SEARCHABLE_PLAYLIST_FIELDS = {'title', 'description'}
+SEARCHABLE_ITEM_FIELDS = {'title'}
+
+
+def _touches(update_fields, searchable):
+    return update_fields is None or bool(searchable & set(update_fields))
+
+
+@receiver(post_save, sender=Playlist)
+def index_saved_playlist(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, SEARCHABLE_PLAYLIST_FIELDS):
+        search.index_playlist(instance.id)
+
+
+@receiver(post_delete, sender=Playlist)
+def unindex_deleted_playlist(sender, instance, **kwargs):
+    search.remove_playlist(instance.id)
+
+
+@receiver(post_save, sender=PlaylistItem)
+def index_saved_item(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, SEARCHABLE_ITEM_FIELDS):
+        search.index_playlist(instance.playlist_id)
+
+
+@receiver(post_delete, sender=PlaylistItem)
+def index_deleted_item(sender, instance, **kwargs):
+    search.index_playlist(instance.playlist_id)
+
+
+@receiver(pre_save, sender=PlaylistItem)
+def remember_item_duration(sender, instance, update_fields=None, **kwargs):
+    # Updates adjust total_duration_minutes by the change in duration
+    instance._previous_duration = None
+    if instance.pk and (update_fields is None or 'duration_minutes' in update_fields):
+        instance._previous_duration = PlaylistItem.objects.filter(
+            pk=instance.pk
+        ).values_list('duration_minutes', flat=True).first()
+
+
+@receiver(post_save, sender=PlaylistItem)
+def count_saved_item(sender, instance, created, **kwargs):
+    duration = instance.duration_minutes or 0
+    if created:
+        deltas = {'item_count': 1, 'total_duration_minutes': duration}
+    else:
+        previous = getattr(instance, '_previous_duration', None) or 0
+        deltas = {'total_duration_minutes': duration - previous}
+    Playlist.objects.filter(id=instance.playlist_id).bump_version(**deltas)
+
+
+@receiver(post_delete, sender=PlaylistItem)
+def count_deleted_item(sender, instance, **kwargs):
+    Playlist.objects.filter(id=instance.playlist_id).bump_version(
+        item_count=-1,
+        total_duration_minutes=-(instance.duration_minutes or 0),
+    )
+
+
+# The version bump also retires cached permissions; see playlists.access
+@receiver(post_save, sender=PlaylistCollaborator)
+def count_saved_collaborator(sender, instance, created, **kwargs):
+    Playlist.objects.filter(id=instance.playlist_id).bump_version(
+        collaborator_count=1 if created else 0
+    )
+
+
+@receiver(post_delete, sender=PlaylistCollaborator)
+def count_deleted_collaborator(sender, instance, **kwargs):
+    Playlist.objects.filter(id=instance.playlist_id).bump_version(collaborator_count=-1)
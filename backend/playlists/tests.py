@@ -0,0 +1,92 @@
+from django.contrib.admin import site
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from . import access
+from .models import Playlist, PlaylistCollaborator
+from .serializers import PlaylistSerializer
+
+
+class CollaboratorAccessCacheTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass')
+        self.editor = User.objects.create_user(username='editor', email='editor@example.com', password='pass')
+        self.playlist = Playlist.objects.create(creator=self.owner, title='Shared')
+        self.collaborator = PlaylistCollaborator.objects.create(
+            playlist=self.playlist,
+            user=self.editor,
+            permission='edit'
+        )
+        cache.clear()
+    
+    def request(self):
+        request = RequestFactory().get('/')
+        request.user = self.editor
+        return request
+    
+    def fresh_playlist(self):
+        return Playlist.objects.get(id=self.playlist.id)
+    
+    def test_revoked_access_is_not_served_from_another_workers_cache(self):
+        playlist = self.fresh_playlist()
+        self.assertTrue(access.can_edit(self.request(), playlist))
+        stale_key = access._cache_key(playlist, self.editor.id)
+        
+        self.collaborator.delete()
+        # Another process never saw the revoke and still holds its entry
+        cache.set(stale_key, access.EDIT)
+        
+        playlist = self.fresh_playlist()
+        self.assertFalse(access.can_edit(self.request(), playlist))
+        self.assertFalse(access.can_view(self.request(), playlist))
+    
+    def test_downgraded_permission_is_not_served_from_cache(self):
+        playlist = self.fresh_playlist()
+        self.assertTrue(access.can_edit(self.request(), playlist))
+        stale_key = access._cache_key(playlist, self.editor.id)
+        
+        self.collaborator.permission = 'view'
+        self.collaborator.save()
+        cache.set(stale_key, access.EDIT)
+        
+        playlist = self.fresh_playlist()
+        self.assertFalse(access.can_edit(self.request(), playlist))
+        self.assertTrue(access.can_view(self.request(), playlist))
+
+
+class PlaylistUpdateTests(TestCase):
+    def test_update_keeps_concurrent_counter_changes(self):
+        owner = get_user_model().objects.create_user(
+            username='owner', email='owner@example.com', password='pass'
+        )
+        playlist = Playlist.objects.create(creator=owner, title='Draft')
+        # A note is added while the update request holds its copy
+        Playlist.objects.filter(id=playlist.id).adjust_counters(note_count=1)
+        
+        serializer = PlaylistSerializer(playlist, data={'title': 'Final'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        
+        playlist.refresh_from_db()
+        self.assertEqual(playlist.title, 'Final')
+        self.assertEqual(playlist.note_count, 1)
+    
+    def test_admin_save_keeps_concurrent_counter_changes(self):
+        owner = get_user_model().objects.create_user(
+            username='owner', email='owner@example.com', password='pass', is_staff=True
+        )
+        playlist = Playlist.objects.create(creator=owner, title='Draft')
+        # An item is added while the admin form holds its copy
+        Playlist.objects.filter(id=playlist.id).bump_version(item_count=1)
+        
+        request = RequestFactory().post('/')
+        request.user = owner
+        playlist.title = 'Final'
+        site._registry[Playlist].save_model(request, playlist, form=None, change=True)
+        
+        playlist.refresh_from_db()
+        self.assertEqual(playlist.title, 'Final')
+        self.assertEqual(playlist.item_count, 1)
+        self.assertEqual(playlist.version, 2)
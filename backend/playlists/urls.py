@@ -3,8 +3,11 @@ from .views import (
     PlaylistListCreateView,
     PlaylistDetailView,
     PlaylistItemCreateView,
+    BulkPlaylistItemCreateView,
     PlaylistItemDetailView,
     ReorderItemsView,
+    MoveItemView,
+    ForkPlaylistView,
     DiscoverPlaylistsView,
     SharePlaylistView,
 )
@@ -13,8 +16,11 @@ urlpatterns = [
     path('', PlaylistListCreateView.as_view(), name='playlist_list_create'),
     path('<int:pk>/', PlaylistDetailView.as_view(), name='playlist_detail'),
     path('<int:playlist_id>/items/', PlaylistItemCreateView.as_view(), name='add_item'),
+    path('<int:playlist_id>/items/bulk/', BulkPlaylistItemCreateView.as_view(), name='bulk_add_items'),
     path('items/<int:pk>/', PlaylistItemDetailView.as_view(), name='item_detail'),
     path('<int:playlist_id>/reorder/', ReorderItemsView.as_view(), name='reorder_items'),
+    path('<int:playlist_id>/items/<int:item_id>/move/', MoveItemView.as_view(), name='move_item'),
+    path('<int:playlist_id>/fork/', ForkPlaylistView.as_view(), name='fork_playlist'),
     path('discover/', DiscoverPlaylistsView.as_view(), name='discover'),
     path('<int:playlist_id>/share/', SharePlaylistView.as_view(), name='share_playlist'),
 ]
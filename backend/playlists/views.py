@@ -1,33 +1,46 @@
+import csv
+import io
+import json
+
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, Case, When, Value, IntegerField
+from rest_framework.pagination import PageNumberPagination
+from eduflex.pagination import KeysetPagination
 
+from . import access, etags, ordering
+from . import search as search_index
 from .models import Playlist, PlaylistItem, PlaylistCollaborator
 from .serializers import (
     PlaylistSerializer,
     PlaylistListSerializer,
+    PlaylistSearchResultSerializer,
     PlaylistItemSerializer,
     PlaylistCollaboratorSerializer,
     ReorderItemsSerializer,
+    MoveItemSerializer,
+    ForkPlaylistSerializer,
 )
 
 
+class PlaylistPagination(KeysetPagination):
+    ordering = ('-updated_at', 'id')
+
+
 class IsOwnerOrCollaborator(permissions.BasePermission):
-    """Permission to check if user is owner or collaborator."""
+    """Permission to check if user is owner or collaborator.
+    
+    Works for playlists and for objects that belong to one (items).
+    """
     
     def has_object_permission(self, request, view, obj):
-        if obj.creator == request.user:
-            return True
+        playlist = obj if isinstance(obj, Playlist) else obj.playlist
         if request.method in permissions.SAFE_METHODS:
-            if obj.is_public:
-                return True
-            return obj.collaborators.filter(user=request.user).exists()
-        return obj.collaborators.filter(
-            user=request.user, 
-            permission='edit'
-        ).exists()
+            return access.can_view(request, playlist)
+        return access.can_edit(request, playlist)
 
 
 class PlaylistListCreateView(generics.ListCreateAPIView):
@@ -39,11 +52,9 @@ class PlaylistListCreateView(generics.ListCreateAPIView):
         return PlaylistSerializer
     
     def get_queryset(self):
-        user = self.request.user
         # Get own playlists and shared playlists
-        return Playlist.objects.filter(
-            Q(creator=user) | Q(collaborators__user=user)
-        ).distinct()
+        queryset = Playlist.objects.accessible_to(self.request.user)
+        return self.get_serializer_class().optimize_queryset(queryset, self.request)
     
     def perform_create(self, serializer):
         serializer.save(creator=self.request.user)
@@ -56,10 +67,24 @@ class PlaylistDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrCollaborator]
     
     def get_queryset(self):
-        user = self.request.user
-        return Playlist.objects.filter(
-            Q(creator=user) | Q(collaborators__user=user) | Q(is_public=True)
-        ).distinct()
+        # Visibility is decided per object by IsOwnerOrCollaborator
+        return PlaylistSerializer.optimize_queryset(Playlist.objects.all(), self.request)
+    
+    def retrieve(self, request, *args, **kwargs):
+        # Probe the version columns first so a current client copy costs
+        # neither the aggregate query nor serialization.
+        probe = get_object_or_404(
+            Playlist.objects.only('id', 'creator_id', 'is_public', 'version', 'updated_at'),
+            pk=kwargs['pk']
+        )
+        self.check_object_permissions(request, probe)
+        etag = etags.playlist_etag(probe, request)
+        if etags.is_current(request, etag):
+            return etags.not_modified(etag)
+        
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data, headers={'ETag': etags.playlist_etag(instance, request)})
 
 
 class PlaylistItemCreateView(generics.CreateAPIView):
@@ -71,36 +96,134 @@ class PlaylistItemCreateView(generics.CreateAPIView):
         playlist = get_object_or_404(Playlist, id=playlist_id)
         
         # Check permission
-        if playlist.creator != request.user:
-            if not playlist.collaborators.filter(
-                user=request.user, 
-                permission='edit'
-            ).exists():
-                return Response(
-                    {'error': 'Permission denied'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+        if not access.can_edit(request, playlist):
+            return Response(
+                {'error': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         # Set order to last position
-        last_order = playlist.items.count()
-        serializer.save(playlist=playlist, order=last_order)
+        serializer.save(playlist=playlist, order=ordering.next_order(playlist))
         
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+class BulkPlaylistItemCreateView(APIView):
+    """Add many items to a playlist in one request.
+    
+    Accepts a JSON list of items (or ``{"items": [...]}``) or a CSV/JSON
+    file uploaded as ``file``. Items are validated together and written
+    with a single ``bulk_create`` after the current last position.
+    """
+    
+    MAX_ITEMS = 1000
+    
+    def post(self, request, playlist_id):
+        playlist = get_object_or_404(Playlist, id=playlist_id)
+        
+        # Check permission
+        if not access.can_edit(request, playlist):
+            return Response(
+                {'error': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            items = self.get_items_data(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not items:
+            return Response(
+                {'error': 'No items provided'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.MAX_ITEMS:
+            return Response(
+                {'error': f'Cannot add more than {self.MAX_ITEMS} items at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = PlaylistItemSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            # Lock the playlist so concurrent imports get contiguous orders
+            Playlist.objects.select_for_update().filter(id=playlist.id).exists()
+            first_order = ordering.next_order(playlist)
+            
+            created = PlaylistItem.objects.bulk_create([
+                PlaylistItem(
+                    playlist=playlist,
+                    **dict(data, order=first_order + index * ordering.ORDER_STEP)
+                )
+                for index, data in enumerate(serializer.validated_data)
+            ])
+            search_index.index_playlist(playlist.id)
+            Playlist.objects.filter(id=playlist.id).bump_version(
+                item_count=len(created),
+                total_duration_minutes=sum(item.duration_minutes or 0 for item in created),
+            )
+        
+        return Response(
+            PlaylistItemSerializer(created, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+    
+    def get_items_data(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            data = request.data
+            if isinstance(data, dict):
+                data = data.get('items', [])
+            if not isinstance(data, list):
+                raise ValueError('Expected a list of items')
+            return data
+        
+        try:
+            content = upload.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValueError('Uploaded file must be UTF-8 encoded')
+        
+        if upload.name.lower().endswith('.json'):
+            try:
+                data = json.loads(content)
+            except json.JSONDecodeError:
+                raise ValueError('Uploaded file is not valid JSON')
+            if isinstance(data, dict):
+                data = data.get('items', [])
+            if not isinstance(data, list):
+                raise ValueError('Expected a list of items')
+            return data
+        
+        # CSV with a header row naming the item fields; blank cells are omitted
+        reader = csv.DictReader(io.StringIO(content))
+        return [
+            {key.strip(): value for key, value in row.items() if key and value not in (None, '')}
+            for row in reader
+        ]
+
+
 class PlaylistItemDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a playlist item."""
     
     serializer_class = PlaylistItemSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwnerOrCollaborator]
     
     def get_queryset(self):
-        return PlaylistItem.objects.filter(
-            Q(playlist__creator=self.request.user) | 
-            Q(playlist__collaborators__user=self.request.user)
-        ).distinct()
+        return PlaylistItem.objects.select_related('playlist')
+    
+    def retrieve(self, request, *args, **kwargs):
+        item = self.get_object()
+        etag = etags.item_etag(item, request)
+        if etags.is_current(request, etag):
+            return etags.not_modified(etag)
+        
+        serializer = self.get_serializer(item)
+        return Response(serializer.data, headers={'ETag': etag})
 
 
 class ReorderItemsView(APIView):
@@ -110,47 +233,225 @@ class ReorderItemsView(APIView):
         playlist = get_object_or_404(Playlist, id=playlist_id)
         
         # Check permission
-        if playlist.creator != request.user:
-            if not playlist.collaborators.filter(
-                user=request.user, 
-                permission='edit'
-            ).exists():
-                return Response(
-                    {'error': 'Permission denied'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+        if not access.can_edit(request, playlist):
+            return Response(
+                {'error': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
         serializer = ReorderItemsSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         item_ids = serializer.validated_data['item_ids']
+        items = PlaylistItem.objects.filter(playlist=playlist).only('id', 'order').in_bulk(item_ids)
         
+        reordered = []
         for index, item_id in enumerate(item_ids):
-            PlaylistItem.objects.filter(
-                id=item_id, 
-                playlist=playlist
-            ).update(order=index)
+            item = items.get(item_id)
+            if item is not None:
+                item.order = index * ordering.ORDER_STEP
+                reordered.append(item)
+        PlaylistItem.objects.bulk_update(reordered, ['order'])
+        Playlist.objects.filter(id=playlist.id).bump_version()
         
         return Response({'message': 'Items reordered successfully'})
 
 
+class MoveItemView(APIView):
+    """Move one item between two neighbours with a single-row write."""
+    
+    def put(self, request, playlist_id, item_id):
+        playlist = get_object_or_404(Playlist, id=playlist_id)
+        
+        # Check permission
+        if not access.can_edit(request, playlist):
+            return Response(
+                {'error': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        item = get_object_or_404(PlaylistItem, id=item_id, playlist=playlist)
+        
+        serializer = MoveItemSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        after_id = serializer.validated_data.get('after_id')
+        before_id = serializer.validated_data.get('before_id')
+        
+        if item.id in (after_id, before_id):
+            return Response(
+                {'error': 'An item cannot be moved next to itself'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        with transaction.atomic():
+            # Serialise with other moves and rebalancing
+            Playlist.objects.select_for_update().filter(id=playlist.id).exists()
+            
+            others = playlist.items.exclude(id=item.id)
+            neighbours = dict(
+                others.filter(id__in=[after_id, before_id]).values_list('id', 'order')
+            )
+            if any(pk is not None and pk not in neighbours for pk in (after_id, before_id)):
+                return Response(
+                    {'error': 'Neighbouring items must belong to this playlist'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            lower = neighbours.get(after_id)
+            upper = neighbours.get(before_id)
+            
+            # Resolve the missing neighbour so the item lands directly beside the given one
+            if upper is None:
+                upper = others.filter(order__gt=lower).order_by('order').values_list(
+                    'order', flat=True
+                ).first()
+            elif lower is None:
+                lower = others.filter(order__lt=upper).order_by('-order').values_list(
+                    'order', flat=True
+                ).first()
+            
+            if lower is not None and upper is not None and lower >= upper:
+                return Response(
+                    {'error': 'after_id must come before before_id'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            item.order = ordering.order_between(lower, upper)
+            PlaylistItem.objects.filter(id=item.id).update(order=item.order)
+            if ordering.needs_rebalance(lower, upper):
+                ordering.rebalance(playlist.id)
+                item.refresh_from_db(fields=['order'])
+            else:
+                Playlist.objects.filter(id=playlist.id).bump_version()
+        
+        return Response(PlaylistItemSerializer(item).data)
+
+
+class ForkPlaylistView(APIView):
+    """Copy a playlist and all of its items into the user's library.
+    
+    The copy is written in one transaction with a single ``bulk_create``
+    for the items, so the number of queries does not grow with the size
+    of the playlist. The cover image is shared by reference: the copy
+    points at the same stored file rather than uploading it again.
+    """
+    
+    ITEM_FIELDS = ['title', 'item_type', 'url', 'description', 'thumbnail',
+                   'duration_minutes', 'order']
+    
+    def post(self, request, playlist_id):
+        source = get_object_or_404(Playlist, id=playlist_id)
+        
+        # Check permission
+        if not access.can_view(request, source):
+            return Response(
+                {'error': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = ForkPlaylistSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = serializer.validated_data
+        
+        with transaction.atomic():
+            items = [
+                PlaylistItem(**values)
+                for values in source.items.order_by().values(*self.ITEM_FIELDS)
+            ]
+            # Counters are known up front, so the copy is created with them
+            fork = Playlist.objects.create(
+                creator=request.user,
+                title=options.get('title', source.title),
+                description=source.description,
+                cover_image=source.cover_image.name if options['copy_cover'] else None,
+                is_public=options['is_public'],
+                item_count=len(items),
+                total_duration_minutes=sum(item.duration_minutes or 0 for item in items),
+            )
+            for item in items:
+                item.playlist = fork
+            PlaylistItem.objects.bulk_create(items)
+            # bulk_create skips the item signals
+            search_index.index_playlist(fork.id)
+        
+        return Response(
+            PlaylistSerializer(fork, context={'request': request}).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
 class DiscoverPlaylistsView(generics.ListAPIView):
-    """Discover public playlists."""
+    """Discover public playlists, ranked by relevance when searching.
+    
+    Without a search, ``?sort=`` picks one of ``SORT_ORDERINGS``; each is
+    backed by an index over the stored playlist counters.
+    """
     
-    serializer_class = PlaylistListSerializer
     permission_classes = [permissions.AllowAny]
     
+    SORT_ORDERINGS = {
+        'recent': ('-updated_at', 'id'),
+        'longest': ('-total_duration_minutes', 'id'),
+        'most_discussed': ('-discussion_count', 'id'),
+        'most_items': ('-item_count', 'id'),
+    }
+    
+    def get_keyset_ordering(self):
+        sort = self.request.query_params.get('sort', 'recent')
+        return self.SORT_ORDERINGS.get(sort, self.SORT_ORDERINGS['recent'])
+    
+    @property
+    def pagination_class(self):
+        # Search results are ranked and capped, so plain pages suit them
+        if self.get_search_text():
+            return PageNumberPagination
+        return PlaylistPagination
+    
+    def get_search_text(self):
+        return self.request.query_params.get('search', '').strip()
+    
+    def get_serializer_class(self):
+        if self.get_search_text() and search_index.is_available():
+            return PlaylistSearchResultSerializer
+        return PlaylistListSerializer
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['search_highlights'] = getattr(self, 'search_highlights', {})
+        return context
+    
     def get_queryset(self):
-        queryset = Playlist.objects.filter(is_public=True)
+        queryset = self.get_serializer_class().optimize_queryset(
+            Playlist.objects.filter(is_public=True), self.request
+        )
+        
+        # Length filters on the stored duration counter
+        for param, lookup in (('min_duration', 'gte'), ('max_duration', 'lte')):
+            value = self.request.query_params.get(param)
+            if value and value.isdigit():
+                queryset = queryset.filter(**{f'total_duration_minutes__{lookup}': int(value)})
         
         # Search filter
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
+        search = self.get_search_text()
+        if not search:
+            return queryset
+        
+        if not search_index.is_available():
+            return queryset.filter(
                 Q(title__icontains=search) | Q(description__icontains=search)
             )
         
-        return queryset
+        hits = search_index.search(search)
+        if not hits:
+            return queryset.none()
+        
+        self.search_highlights = {hit.playlist_id: hit.highlights for hit in hits}
+        rank = Case(
+            *[When(id=hit.playlist_id, then=Value(position))
+              for position, hit in enumerate(hits)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(id__in=self.search_highlights).order_by(rank)
 
 
 class SharePlaylistView(APIView):
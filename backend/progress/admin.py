@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Progress, LearningStreak
+from .models import Progress, LearningStreak, ProgressBatch, StreakSummary
 
 
 @admin.register(Progress)
@@ -14,3 +14,16 @@ class LearningStreakAdmin(admin.ModelAdmin):
     list_display = ['user', 'date', 'minutes_learned', 'items_completed']
     list_filter = ['date']
     search_fields = ['user__email']
+
+
+@admin.register(ProgressBatch)
+class ProgressBatchAdmin(admin.ModelAdmin):
+    list_display = ['user', 'idempotency_key', 'event_count', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['user__email', 'idempotency_key']
+
+
+@admin.register(StreakSummary)
+class StreakSummaryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'current_streak', 'longest_streak', 'last_active_date']
+    search_fields = ['user__email']
@@ -0,0 +1,92 @@
+"""
+Cached completion bitmaps.
+
+For every (user, playlist) pair the cache holds the playlist's item ids in
+display order together with a bitmap whose bit ``i`` is set when the user
+has completed item ``i``. Entries are keyed on the playlist ``version``,
+which is bumped whenever items are added, removed or reordered, and on
+the user's ``ProgressVersion``, which every progress write bumps. Both
+are read from the database with the playlist, so no process serves an
+entry that predates a reorder or a completion, whichever process handled
+it.
+"""
+import base64
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def with_progress_version(playlists, user_id):
+    """Annotate ``playlists`` with the ``progress_version`` of ``user_id``."""
+    from .models import ProgressVersion
+
+    return playlists.annotate(progress_version=Coalesce(
+        Subquery(ProgressVersion.objects.filter(user_id=user_id).values('version')[:1]),
+        Value(0)
+    ))
+
+
+def _cache_key(playlist, user_id):
+    # Read with_progress_version before the progress rows an entry is built from
+    return f'progress-bitmap:{playlist.id}:{playlist.version}:{user_id}:{playlist.progress_version}'
+
+
+def encode(flags):
+    """Pack booleans into bytes, item 0 in the lowest bit of byte 0."""
+    bits = bytearray((len(flags) + 7) // 8)
+    for index, flag in enumerate(flags):
+        if flag:
+            bits[index // 8] |= 1 << (index % 8)
+    return bytes(bits)
+
+
+def store(playlist, user_id, item_ids, completed_ids):
+    """Cache the bitmap of ``item_ids`` given in display order."""
+    entry = {
+        'item_ids': list(item_ids),
+        'bits': encode([item_id in completed_ids for item_id in item_ids]),
+    }
+    cache.set(
+        _cache_key(playlist, user_id),
+        entry,
+        settings.PROGRESS_BITMAP_CACHE_TIMEOUT
+    )
+    return entry
+
+
+def build(playlist, user_id):
+    """Rebuild the bitmap from the database with two narrow queries."""
+    from playlists.models import PlaylistItem
+    from .models import Progress
+
+    item_ids = PlaylistItem.objects.filter(playlist_id=playlist.id).values_list('id', flat=True)
+    completed_ids = set(Progress.objects.filter(
+        user_id=user_id,
+        playlist_item__playlist_id=playlist.id,
+        is_completed=True
+    ).values_list('playlist_item_id', flat=True))
+    return store(playlist, user_id, item_ids, completed_ids)
+
+
+def get(playlist, user_id):
+    """The cached bitmap entry for ``playlist``, built on a miss.
+
+    ``playlist`` must come from a ``with_progress_version`` queryset.
+    """
+    entry = cache.get(_cache_key(playlist, user_id))
+    if entry is None:
+        entry = build(playlist, user_id)
+    return entry
+
+
+def as_payload(playlist, entry):
+    """JSON-friendly form of a bitmap entry."""
+    return {
+        'playlist_id': playlist.id,
+        'version': playlist.version,
+        'total_items': len(entry['item_ids']),
+        'completed_items': sum(bin(byte).count('1') for byte in entry['bits']),
+        'bitmap': base64.b64encode(entry['bits']).decode(),
+    }
@@ -0,0 +1,173 @@
+"""
+Write-behind buffer for watch-time increments.
+
+Heartbeats that only add watch time are summed in memory per
+(user, item) and written with one multi-row upsert when the oldest
+pending increment is ``PROGRESS_BUFFER_FLUSH_SECONDS`` old, when
+``PROGRESS_BUFFER_MAX_KEYS`` pairs are pending, or when the process
+exits. Completions bypass the buffer because they also touch the streak
+rows. The buffer is per process; reads add ``pending_for()`` to the
+stored totals so a user sees their own unflushed time.
+
+Increments are added only once the transaction that accepted them has
+committed, so a rolled back request leaves nothing behind, and flushes
+run on a timer thread with its own connection rather than inside the
+transaction of whichever request filled the buffer.
+
+Setting ``PROGRESS_BUFFER_FLUSH_SECONDS`` to 0 disables the buffer and
+every increment is written immediately.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Thread-safe accumulator of ``time_spent_seconds`` increments."""
+
+    def __init__(self, flush_seconds, max_keys):
+        self.flush_seconds = flush_seconds
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # user id -> item id -> [seconds, last seen], for pending and in-flight increments
+        self._pending = {}
+        self._flushing = {}
+        self._size = 0
+        self._timer = None
+        self._flush_due = False
+
+    def add(self, user_id, item_id, seconds):
+        if not seconds:
+            return
+        with self._lock:
+            self._merge(user_id, item_id, seconds, timezone.now())
+            if self._size >= self.max_keys:
+                if not self._flush_due:
+                    # Flush right away, but not on the caller's thread: it may
+                    # be inside a transaction whose rollback would take every
+                    # other user's increments with it
+                    self._flush_due = True
+                    self._schedule(0)
+            elif self._timer is None:
+                self._schedule(self.flush_seconds)
+
+    def pending_for(self, user_id):
+        """Unflushed seconds of ``user_id`` by item id."""
+        with self._lock:
+            totals = {}
+            for batch in (self._flushing, self._pending):
+                for item_id, (seconds, _) in batch.get(user_id, {}).items():
+                    totals[item_id] = totals.get(item_id, 0) + seconds
+        return totals
+
+    def flush(self):
+        """Write all pending increments; returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                self._flush_due = False
+                self._flushing, self._pending = self._pending, {}
+                self._size = 0
+                batch = self._flushing
+            try:
+                written = self._write(batch)
+            except Exception:
+                logger.exception('Flushing buffered progress failed; keeping increments')
+                with self._lock:
+                    for user_id, items in batch.items():
+                        for item_id, (seconds, last_seen) in items.items():
+                            self._merge(user_id, item_id, seconds, last_seen)
+                written = 0
+            with self._lock:
+                self._flushing = {}
+        return written
+
+    def _merge(self, user_id, item_id, seconds, last_seen):
+        items = self._pending.setdefault(user_id, {})
+        if item_id not in items:
+            items[item_id] = [0, last_seen]
+            self._size += 1
+        entry = items[item_id]
+        entry[0] += seconds
+        entry[1] = max(entry[1], last_seen)
+
+    def _schedule(self, delay):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._flush_from_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # Timer threads get their own connection; don't leak it
+            connection.close()
+
+    @staticmethod
+    def _write(batch):
+        from playlists.models import PlaylistItem
+        from .models import Progress
+        from .services import bump_progress_versions, upsert
+
+        if not batch:
+            return 0
+        # Items deleted since the heartbeat would fail the whole upsert
+        item_ids = {item_id for items in batch.values() for item_id in items}
+        existing = set(PlaylistItem.objects.filter(id__in=item_ids).values_list('id', flat=True))
+        rows = [
+            {
+                'user': user_id,
+                'playlist_item': item_id,
+                'is_completed': False,
+                'time_spent_seconds': seconds,
+                'completed_at': None,
+                'last_accessed': last_seen,
+            }
+            for user_id, items in batch.items()
+            for item_id, (seconds, last_seen) in items.items()
+            if item_id in existing
+        ]
+        with transaction.atomic():
+            upsert(
+                Progress, rows,
+                conflict_fields=['user', 'playlist_item'],
+                increments=['time_spent_seconds'],
+                replace=['last_accessed'],
+            )
+            bump_progress_versions(*batch)
+        return len(rows)
+
+
+_buffer = WriteBehindBuffer(
+    settings.PROGRESS_BUFFER_FLUSH_SECONDS,
+    settings.PROGRESS_BUFFER_MAX_KEYS,
+)
+atexit.register(_buffer.flush)
+
+
+def is_enabled():
+    return settings.PROGRESS_BUFFER_FLUSH_SECONDS > 0
+
+
+def add(user_id, item_id, seconds):
+    """Queue ``seconds`` of watch time for a (user, item) pair."""
+    _buffer.add(user_id, item_id, seconds)
+
+
+def pending_for(user_id):
+    return _buffer.pending_for(user_id)
+
+
+def flush():
+    return _buffer.flush()
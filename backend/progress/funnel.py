@@ -0,0 +1,127 @@
+"""
+Drop-off funnel analytics for playlist creators.
+
+All progress rows of a playlist are loaded as parallel arrays with one
+query and every statistic is computed with vectorized NumPy operations,
+so the cost is dominated by that single scan rather than by the number
+of items or learners. Results are stored in ``PlaylistFunnel`` and
+recomputed once they are older than ``CREATOR_FUNNEL_MAX_AGE`` or by
+the ``refresh_creator_funnels`` command.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PlaylistFunnel, Progress
+
+WATCH_TIME_BINS = 10
+
+
+def _group_percentiles(groups, values, count, quantiles):
+    """Per-group percentiles of ``values`` for group ids in ``range(count)``.
+
+    Uses linear interpolation like ``np.percentile``; empty groups get 0.
+    """
+    order = np.lexsort((values, groups))
+    sorted_values = values[order].astype(float)
+    sizes = np.bincount(groups, minlength=count)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    result = {}
+    present = sizes > 0
+    for quantile in quantiles:
+        position = starts + (sizes - 1).clip(min=0) * quantile
+        low = np.floor(position).astype(int)
+        high = np.ceil(position).astype(int)
+        weight = position - low
+        column = np.zeros(count)
+        if sorted_values.size:
+            low_values = sorted_values[low[present]]
+            high_values = sorted_values[high[present]]
+            column[present] = low_values + (high_values - low_values) * weight[present]
+        result[quantile] = column
+    return result
+
+
+def compute(playlist):
+    """Funnel statistics of ``playlist`` as a JSON-friendly dict."""
+    items = list(playlist.items.values_list('id', 'title'))
+    item_ids = np.array([item_id for item_id, _ in items], dtype=np.int64)
+    count = len(items)
+
+    rows = np.array(
+        Progress.objects.filter(playlist_item__playlist=playlist).order_by().values_list(
+            'user_id', 'playlist_item_id', 'is_completed', 'time_spent_seconds'
+        ),
+        dtype=np.int64
+    ).reshape(-1, 4)
+    users, row_items, completed, seconds = rows.T
+
+    # Map item ids to their position in playlist order
+    by_id = np.argsort(item_ids)
+    positions = by_id[np.searchsorted(item_ids, row_items, sorter=by_id)] if count else row_items
+    learner_ids, learner_index = np.unique(users, return_inverse=True)
+    learners = learner_ids.size
+
+    started = np.bincount(positions, minlength=count)
+    finished = np.bincount(positions, weights=completed, minlength=count).astype(int)
+    percentiles = _group_percentiles(positions, seconds, count, (0.25, 0.5, 0.75))
+
+    # Furthest item each learner reached, and the share reaching each item
+    furthest = np.full(learners, -1)
+    np.maximum.at(furthest, learner_index, positions)
+    reached = np.bincount(furthest, minlength=count)[:count]
+    survival = reached[::-1].cumsum()[::-1] / learners if learners else np.zeros(count)
+    below_half = np.flatnonzero(survival < 0.5)
+
+    completed_per_learner = np.bincount(learner_index, weights=completed, minlength=learners)
+    minutes_per_learner = np.bincount(learner_index, weights=seconds, minlength=learners) / 60
+    watch_counts, watch_edges = np.histogram(minutes_per_learner, bins=WATCH_TIME_BINS)
+
+    return {
+        'playlist_id': playlist.id,
+        'learners': int(learners),
+        'half_drop_position': int(below_half[0]) if learners and below_half.size else None,
+        'items': [
+            {
+                'item_id': item_id,
+                'title': title,
+                'position': position,
+                'started': int(started[position]),
+                'completed': int(finished[position]),
+                'completion_rate': round(float(finished[position]) / learners, 4) if learners else 0,
+                'reached_rate': round(float(survival[position]), 4),
+                'p25_seconds': round(float(percentiles[0.25][position]), 1),
+                'median_seconds': round(float(percentiles[0.5][position]), 1),
+                'p75_seconds': round(float(percentiles[0.75][position]), 1),
+            }
+            for position, (item_id, title) in enumerate(items)
+        ],
+        'completed_items_histogram': np.bincount(
+            completed_per_learner.astype(int), minlength=count + 1
+        ).tolist(),
+        'watch_time_histogram': {
+            'bin_edges_minutes': [round(float(edge), 1) for edge in watch_edges],
+            'counts': watch_counts.tolist(),
+        },
+    }
+
+
+def refresh(playlist):
+    """Recompute and store the funnel of ``playlist``."""
+    funnel, _ = PlaylistFunnel.objects.update_or_create(
+        playlist=playlist,
+        defaults={'data': compute(playlist), 'computed_at': timezone.now()}
+    )
+    return funnel
+
+
+def get(playlist):
+    """The stored funnel of ``playlist``, recomputed when it is too old."""
+    funnel = PlaylistFunnel.objects.filter(playlist=playlist).first()
+    max_age = timedelta(seconds=settings.CREATOR_FUNNEL_MAX_AGE)
+    if funnel is None or funnel.computed_at < timezone.now() - max_age:
+        funnel = refresh(playlist)
+    return funnel
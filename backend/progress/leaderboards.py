@@ -0,0 +1,274 @@
+"""
+Learner leaderboards.
+
+A board keeps the score of every member of its scope in a dict, but only
+its ``TOP_SIZE`` best members in rank order, so a progress write costs a
+dict update and at most a short list insert however many learners the
+board has. ``top(k)`` is a slice of that list. ``rank()`` is a binary
+search, in the top list for its members and otherwise over the scores of
+the last reconciliation, so ranks below the top can lag behind by one
+reconciliation.
+
+Boards are never aggregated on the read path. The
+``reconcile_leaderboards`` command, meant to run on a schedule, rebuilds
+every board from the database and stores it as a ``LeaderboardSnapshot``.
+Processes load a board from its snapshot and fold in the progress writes
+they handle themselves. Every ``LEADERBOARD_RELOAD_SECONDS`` they check
+for a newer snapshot, which carries the writes handled by other
+processes. A board whose period (the week, or the day for streaks) has
+moved past its snapshot starts empty, as it is at the start of a period.
+
+Boards:
+
+- ``weekly_minutes``: minutes learned since Monday
+- ``streaks``: current streak of users active today
+- ``playlist_completions``: items completed in one playlist
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import LeaderboardSnapshot, LearningStreak, Progress, StreakSummary
+
+WEEKLY_MINUTES = 'weekly_minutes'
+STREAKS = 'streaks'
+PLAYLIST_COMPLETIONS = 'playlist_completions'
+
+# Members kept in rank order per board; the most a board can list
+TOP_SIZE = 100
+
+# Per-playlist boards kept in memory, least recently read dropped first
+MAX_PLAYLIST_BOARDS = 256
+
+
+class Leaderboard:
+    """Scores of members ranked highest first, ties by member id.
+
+    ``ranking`` is ``(member, score)`` pairs, best first.
+    """
+
+    def __init__(self, ranking=(), size=TOP_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._scores = {}
+        # Negated scores of the ranking, ascending, to rank members below the top
+        self._reconciled = []
+        for member, score in ranking:
+            if score > 0:
+                self._scores[member] = score
+                self._reconciled.append(-score)
+        self._top = [
+            (-score, member) for member, score in ranking if score > 0
+        ][:size]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._scores)
+
+    def set(self, member, score):
+        with self._lock:
+            self._set(member, score)
+
+    def add(self, member, delta):
+        with self._lock:
+            self._set(member, self._scores.get(member, 0) + delta)
+
+    def top(self, count):
+        with self._lock:
+            return self._top_entries(count)
+
+    def rank(self, member):
+        """1-based rank and score of ``member``, or None if unranked."""
+        with self._lock:
+            return self._rank(member)
+
+    def standings(self, count, member):
+        """``(learners, top(count), rank(member))`` read together."""
+        with self._lock:
+            return len(self._scores), self._top_entries(count), self._rank(member)
+
+    def _set(self, member, score):
+        previous = self._scores.pop(member, None)
+        if previous is not None:
+            index = bisect_left(self._top, (-previous, member))
+            if index < len(self._top) and self._top[index] == (-previous, member):
+                del self._top[index]
+        if score <= 0:
+            return
+        self._scores[member] = score
+        # The top list always holds the best members, so an entry joins it
+        # if every other member is listed or it outranks the last one
+        entry = (-score, member)
+        if len(self._top) == len(self._scores) - 1 or (self._top and entry < self._top[-1]):
+            insort(self._top, entry)
+            del self._top[self.size:]
+
+    def _top_entries(self, count):
+        return [(member, -score) for score, member in self._top[:count]]
+
+    def _rank(self, member):
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        index = bisect_left(self._top, (-score, member))
+        if index < len(self._top) and self._top[index] == (-score, member):
+            return index + 1, score
+        # Below the top: count the reconciled scores higher than this one
+        return max(bisect_left(self._reconciled, -score), len(self._top)) + 1, score
+
+
+def _week_start(today):
+    return today - timedelta(days=today.weekday())
+
+
+def _period(board, today):
+    """Start of the period ``board`` covers on ``today``; None for lifetime boards."""
+    if board == WEEKLY_MINUTES:
+        return _week_start(today)
+    if board == STREAKS:
+        return today
+    return None
+
+
+def _ranked(rows):
+    """``(user id, score)`` pairs of ``rows`` that scored, best first."""
+    return sorted(
+        ((row['user_id'], row['score']) for row in rows if row['score'] > 0),
+        key=lambda pair: (-pair[1], pair[0])
+    )
+
+
+def reconcile(today=None):
+    """Rebuild every board from the database and store its snapshot.
+
+    Returns the number of boards stored. Snapshots of playlists nobody has
+    completed anything in any more are deleted.
+    """
+    today = today or timezone.now().date()
+    week = _week_start(today)
+
+    weekly = LearningStreak.objects.filter(
+        date__gte=week,
+        date__lt=week + timedelta(days=7)
+    ).order_by().values('user_id').annotate(score=Sum('minutes_learned'))
+    streaks = StreakSummary.objects.filter(
+        last_active_date=today,
+        current_streak__gt=0
+    ).values('user_id', score=F('current_streak'))
+    completions = defaultdict(list)
+    for row in Progress.objects.filter(is_completed=True).order_by().values(
+        'user_id', playlist_id=F('playlist_item__playlist_id')
+    ).annotate(score=Count('id')):
+        completions[row['playlist_id']].append(row)
+
+    computed_at = timezone.now()
+    snapshots = [
+        LeaderboardSnapshot(
+            board=WEEKLY_MINUTES, period=week, scores=_ranked(weekly), computed_at=computed_at
+        ),
+        LeaderboardSnapshot(
+            board=STREAKS, period=today, scores=_ranked(streaks), computed_at=computed_at
+        ),
+    ] + [
+        LeaderboardSnapshot(
+            board=PLAYLIST_COMPLETIONS, scope=playlist_id, period=None,
+            scores=_ranked(rows), computed_at=computed_at
+        )
+        for playlist_id, rows in completions.items()
+    ]
+    with transaction.atomic():
+        LeaderboardSnapshot.objects.bulk_create(
+            snapshots,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['board', 'scope'],
+            update_fields=['period', 'scores', 'computed_at'],
+        )
+        LeaderboardSnapshot.objects.filter(computed_at__lt=computed_at).delete()
+    return len(snapshots)
+
+
+class _Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards = OrderedDict()
+
+    def get(self, board, scope=None):
+        """The board for ``scope``, reloaded first if a newer snapshot exists."""
+        key = (board, scope)
+        period = _period(board, timezone.now().date())
+        now = time.monotonic()
+        with self._lock:
+            entry = self._boards.get(key)
+            if entry is not None:
+                self._boards.move_to_end(key)
+                if (entry['period'] == period
+                        and now - entry['checked'] < settings.LEADERBOARD_RELOAD_SECONDS):
+                    return entry['board']
+
+        # Scores are only read if the snapshot changed since it was loaded
+        snapshot = LeaderboardSnapshot.objects.defer('scores').filter(
+            board=board,
+            scope=scope or 0,
+            period=period
+        ).first()
+        computed_at = snapshot.computed_at if snapshot else None
+        if entry is not None and entry['period'] == period and entry['computed_at'] == computed_at:
+            with self._lock:
+                entry['checked'] = now
+            return entry['board']
+
+        leaderboard = Leaderboard(snapshot.scores if snapshot else ())
+        with self._lock:
+            self._boards[key] = {
+                'board': leaderboard,
+                'period': period,
+                'computed_at': computed_at,
+                'checked': now,
+            }
+            self._boards.move_to_end(key)
+            playlist_boards = [k for k in self._boards if k[0] == PLAYLIST_COMPLETIONS]
+            for stale in playlist_boards[:-MAX_PLAYLIST_BOARDS]:
+                del self._boards[stale]
+        return leaderboard
+
+    def update(self, board, scope, date, apply):
+        """Apply ``apply(leaderboard)`` if the board is loaded for ``date``'s period."""
+        with self._lock:
+            entry = self._boards.get((board, scope))
+            if entry is not None and entry['period'] == _period(board, date):
+                apply(entry['board'])
+
+
+_registry = _Registry()
+
+
+def get(board, scope=None):
+    return _registry.get(board, scope)
+
+
+def record(user_id, minutes_by_date=None, completed_playlists=(), streak=None):
+    """Fold one committed progress write into the loaded boards."""
+    for date, minutes in (minutes_by_date or {}).items():
+        if minutes:
+            _registry.update(
+                WEEKLY_MINUTES, None, date,
+                lambda leaderboard, minutes=minutes: leaderboard.add(user_id, minutes)
+            )
+    for playlist_id in completed_playlists:
+        _registry.update(
+            PLAYLIST_COMPLETIONS, playlist_id, timezone.now().date(),
+            lambda leaderboard: leaderboard.add(user_id, 1)
+        )
+    if streak is not None and streak.last_active_date is not None:
+        _registry.update(
+            STREAKS, None, streak.last_active_date,
+            lambda leaderboard: leaderboard.set(user_id, streak.current_streak)
+        )
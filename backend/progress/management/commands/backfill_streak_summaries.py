@@ -0,0 +1,35 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from progress import streaks
+from progress.models import LearningStreak, StreakSummary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every StreakSummary from the LearningStreak history.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        rows = LearningStreak.objects.filter(minutes_learned__gt=0).order_by(
+            'user_id', 'date'
+        ).values_list('user_id', 'date').iterator(chunk_size=options['batch_size'])
+        
+        summaries = []
+        for user_id, group in groupby(rows, key=lambda row: row[0]):
+            current, longest, last_active = streaks.summarize(date for _, date in group)
+            summaries.append(StreakSummary(
+                user_id=user_id,
+                current_streak=current,
+                longest_streak=longest,
+                last_active_date=last_active,
+            ))
+        
+        with transaction.atomic():
+            StreakSummary.objects.all().delete()
+            StreakSummary.objects.bulk_create(summaries, batch_size=options['batch_size'])
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(summaries)} streak summaries.'))
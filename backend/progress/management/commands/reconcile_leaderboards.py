@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from progress import leaderboards
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild every learner leaderboard from the database and store it '
+        'for the API processes to load. Meant to run on a schedule.'
+    )
+    
+    def handle(self, *args, **options):
+        written = leaderboards.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {written} leaderboards.'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from playlists.models import Playlist
+from progress import funnel
+from progress.models import PlaylistFunnel, Progress
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the stored drop-off funnel of every playlist with progress '
+        'newer than its funnel. Meant to run on a schedule.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recompute every playlist with progress, changed or not'
+        )
+    
+    def handle(self, *args, **options):
+        latest = dict(
+            Progress.objects.order_by().values('playlist_item__playlist_id').annotate(
+                latest=Max('last_accessed')
+            ).values_list('playlist_item__playlist_id', 'latest')
+        )
+        computed = dict(PlaylistFunnel.objects.values_list('playlist_id', 'computed_at'))
+        stale = [
+            playlist_id for playlist_id, last_accessed in latest.items()
+            if options['all'] or playlist_id not in computed or computed[playlist_id] < last_accessed
+        ]
+        
+        for playlist in Playlist.objects.filter(id__in=stale).only('id').iterator():
+            funnel.refresh(playlist)
+        
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {len(stale)} playlist funnels.'))
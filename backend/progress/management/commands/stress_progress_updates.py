@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from playlists.models import Playlist, PlaylistItem
+from progress import buffer
+from progress.models import Progress, LearningStreak
+from progress.views import UpdateProgressView
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent progress updates for one user from many threads and '
+        'check that the stored totals are exact. Fixture rows are committed '
+        'so every thread can see them, and deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--updates', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--items', type=int, default=5)
+        parser.add_argument('--seconds', type=int, default=60, help='Watch time per update')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        seconds = options['seconds']
+
+        user, items = self.create_fixtures(options['items'])
+        try:
+            # Each event is (item id, completed); roughly one in ten completes
+            events = [
+                (rng.choice(items).id, rng.random() < 0.1)
+                for _ in range(options['updates'])
+            ]
+            failures = []
+            chunks = [events[index::options['threads']] for index in range(options['threads'])]
+            workers = [
+                threading.Thread(target=self.send, args=(user, chunk, seconds, failures))
+                for chunk in chunks
+            ]
+
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            buffer.flush()
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f'{len(events)} updates from {len(workers)} threads in {elapsed:.2f}s, '
+                f'{len(failures)} failed'
+            )
+            problems = failures[:5] + self.verify(user, events, seconds)
+        finally:
+            user.delete()
+
+        if problems:
+            for problem in problems:
+                self.stderr.write(str(problem))
+            raise CommandError('Stored progress does not match the updates sent')
+        self.stdout.write(self.style.SUCCESS('All totals are exact'))
+
+    def create_fixtures(self, count):
+        User = get_user_model()
+        user = User.objects.create_user(
+            email='progress-stress@example.com',
+            username='progress-stress',
+            password=None
+        )
+        playlist = Playlist.objects.create(creator=user, title='Progress stress test')
+        items = [
+            PlaylistItem.objects.create(playlist=playlist, title=f'Item {index}', url='https://example.com')
+            for index in range(count)
+        ]
+        return user, items
+
+    def send(self, user, events, seconds, failures):
+        factory = APIRequestFactory()
+        view = UpdateProgressView.as_view()
+        try:
+            for item_id, completed in events:
+                request = factory.post('/api/progress/', {
+                    'playlist_item_id': item_id,
+                    'time_spent_seconds': seconds,
+                    'is_completed': completed,
+                }, format='json')
+                force_authenticate(request, user=user)
+                try:
+                    response = view(request)
+                except Exception as exc:
+                    failures.append(exc)
+                    continue
+                if response.status_code != 200:
+                    failures.append(f'HTTP {response.status_code}: {response.data}')
+        finally:
+            connection.close()
+
+    def verify(self, user, events, seconds):
+        problems = []
+        expected_time = Counter()
+        for item_id, _ in events:
+            expected_time[item_id] += seconds
+        completed = {item_id for item_id, done in events if done}
+
+        rows = Progress.objects.filter(user=user).values_list(
+            'playlist_item_id', 'time_spent_seconds', 'is_completed'
+        )
+        stored = {item_id: (time_spent, done) for item_id, time_spent, done in rows}
+        for item_id, total in expected_time.items():
+            time_spent, done = stored.get(item_id, (0, False))
+            if time_spent != total:
+                problems.append(f'item {item_id}: {time_spent}s stored, {total}s sent')
+            if done != (item_id in completed):
+                problems.append(f'item {item_id}: is_completed is {done}')
+
+        streak = LearningStreak.objects.filter(user=user, date=timezone.now().date()).first()
+        items_completed = streak.items_completed if streak else 0
+        minutes = streak.minutes_learned if streak else 0
+        if items_completed != len(completed):
+            problems.append(f'streak: {items_completed} completions stored, {len(completed)} expected')
+        if minutes != len(completed) * (seconds // 60):
+            problems.append(f'streak: {minutes} minutes stored, {len(completed) * (seconds // 60)} expected')
+        return problems
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0007_playlist_counters'),
+        ('progress', '0004_streak_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlaylistFunnel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField()),
+                ('playlist', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='funnel', to='playlists.playlist')),
+            ],
+        ),
+    ]
@@ -29,6 +29,25 @@ class Progress(models.Model):
         return f"{self.user.email} - {self.playlist_item.title} ({status})"
 
 
+class ProgressVersion(models.Model):
+    """Number of progress writes of a user, which keys caches built from them.
+    
+    Bumped in the transaction of every write, so no process reads a cached
+    entry computed before the write.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='progress_version'
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.version}"
+
+
 class LearningStreak(models.Model):
     """Tracks daily learning activity for streak calculation."""
     
@@ -47,3 +66,78 @@ class LearningStreak(models.Model):
     
     def __str__(self):
         return f"{self.user.email} - {self.date}: {self.minutes_learned} mins"
+
+
+class ProgressBatch(models.Model):
+    """A processed batch of progress events, kept to make retries idempotent."""
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='progress_batches'
+    )
+    idempotency_key = models.CharField(max_length=64)
+    event_count = models.PositiveIntegerField(default=0)
+    response = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['user', 'idempotency_key']
+        indexes = [
+            models.Index(fields=['created_at'], name='progress_batch_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.idempotency_key}"
+
+
+class StreakSummary(models.Model):
+    """Per-user streak totals, maintained as active days are recorded."""
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='streak_summary'
+    )
+    # Consecutive active days ending on last_active_date
+    current_streak = models.PositiveIntegerField(default=0)
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.current_streak} days"
+
+
+class PlaylistFunnel(models.Model):
+    """Stored drop-off funnel of a playlist; see progress.funnel."""
+    
+    playlist = models.OneToOneField(
+        'playlists.Playlist',
+        on_delete=models.CASCADE,
+        related_name='funnel'
+    )
+    data = models.JSONField(default=dict)
+    computed_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.playlist.title} - {self.computed_at}"
+
+
+class LeaderboardSnapshot(models.Model):
+    """Reconciled scores of one leaderboard; see progress.leaderboards."""
+    
+    board = models.CharField(max_length=30)
+    # Playlist id of per-playlist boards, 0 for global ones
+    scope = models.PositiveBigIntegerField(default=0)
+    # Start of the period scored, null for lifetime boards
+    period = models.DateField(null=True, blank=True)
+    # [user id, score] pairs, best first
+    scores = models.JSONField(default=list)
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['board', 'scope']
+    
+    def __str__(self):
+        return f"{self.board} {self.scope} - {self.computed_at}"
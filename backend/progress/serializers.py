@@ -1,5 +1,9 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Progress, LearningStreak
+from .timeseries import GRANULARITIES, count_buckets
 
 
 class ProgressSerializer(serializers.ModelSerializer):
@@ -42,3 +46,42 @@ class WeeklyStatsSerializer(serializers.Serializer):
     current_streak = serializers.IntegerField()
     longest_streak = serializers.IntegerField()
     daily_breakdown = serializers.ListField()
+
+
+class ProgressEventSerializer(serializers.Serializer):
+    """Serializer for one progress event reported by the player."""
+    
+    playlist_item_id = serializers.IntegerField()
+    seconds = serializers.IntegerField(min_value=0, default=0)
+    completed = serializers.BooleanField(default=False)
+    client_ts = serializers.DateTimeField(required=False)
+
+
+class ProgressBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of progress events."""
+    
+    MAX_EVENTS = 500
+    
+    idempotency_key = serializers.CharField(max_length=64, required=False)
+    events = ProgressEventSerializer(many=True, max_length=MAX_EVENTS)
+
+
+class TimeSeriesQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the learning time series."""
+    
+    MAX_BUCKETS = 1000
+    
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default='day')
+    
+    def validate(self, attrs):
+        end = attrs.setdefault('end', timezone.now().date())
+        start = attrs.setdefault('start', end - timedelta(days=6))
+        if start > end:
+            raise serializers.ValidationError('start must not be after end.')
+        if count_buckets(start, end, attrs['granularity']) > self.MAX_BUCKETS:
+            raise serializers.ValidationError(
+                f'The range spans more than {self.MAX_BUCKETS} buckets; use a coarser granularity.'
+            )
+        return attrs
@@ -0,0 +1,200 @@
+"""
+Write paths for progress tracking.
+
+The player sends heartbeats concurrently for the same progress and
+streak rows, so both are written with ``INSERT ... ON CONFLICT DO UPDATE``
+and increments evaluated by the database instead of a read-modify-write
+in Python. This needs SQLite 3.24+ or PostgreSQL.
+"""
+import datetime
+from dataclasses import dataclass
+
+from django.db import connection, models, transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from . import buffer, leaderboards, streaks
+from .models import Progress, ProgressVersion, LearningStreak
+
+
+def upsert(model, rows, conflict_fields, increments=(), replace=()):
+    """Insert ``rows`` or update the rows they conflict with.
+
+    On conflict, ``increments`` columns are added to the stored value and
+    ``replace`` columns are overwritten. ``rows`` are dicts keyed by field
+    name and must all have the same keys.
+    """
+    if not rows:
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    fields = [model._meta.get_field(name) for name in rows[0]]
+
+    def column(name):
+        return connection.ops.quote_name(model._meta.get_field(name).column)
+
+    assignments = [
+        f'{column(name)} = {table}.{column(name)} + excluded.{column(name)}'
+        for name in increments
+    ] + [
+        f'{column(name)} = excluded.{column(name)}'
+        for name in replace
+    ]
+    placeholders = ', '.join(['%s'] * len(fields))
+    # Stay under the backend's bound parameter limit, if it has one
+    max_params = connection.features.max_query_params
+    chunk_size = max(1, max_params // len(fields)) if max_params else len(rows)
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            sql = (
+                f'INSERT INTO {table} ({", ".join(column(field.name) for field in fields)}) '
+                f'VALUES {", ".join([f"({placeholders})"] * len(chunk))} '
+                f'ON CONFLICT ({", ".join(column(name) for name in conflict_fields)}) '
+                f'DO UPDATE SET {", ".join(assignments)}'
+            )
+            params = [
+                field.get_db_prep_save(row[field.name], connection)
+                for row in chunk for field in fields
+            ]
+            cursor.execute(sql, params)
+
+
+def bump_progress_versions(*user_ids):
+    """Retire every cached entry built from these users' progress."""
+    upsert(
+        ProgressVersion,
+        [{'user': user_id, 'version': 1} for user_id in user_ids],
+        conflict_fields=['user'],
+        increments=['version'],
+    )
+
+
+@dataclass
+class ProgressUpdate:
+    """Watch time to add to one item, and when it was completed if it was."""
+
+    playlist_item: object
+    seconds: int = 0
+    completed_at: datetime.datetime = None
+
+
+def apply_progress(user, updates):
+    """Apply ``ProgressUpdate``s for distinct items of one user.
+
+    Everything is written in one transaction with one upsert for the
+    progress rows, one conditional UPDATE for completions and one upsert
+    for the affected streak days. Returns the ids of the items completed
+    for the first time.
+    """
+    if buffer.is_enabled():
+        # Plain watch time is written behind; see progress.buffer. Only once
+        # the caller commits, or a rolled back batch would still be counted
+        pending = [
+            (update.playlist_item.id, update.seconds)
+            for update in updates if update.completed_at is None
+        ]
+        transaction.on_commit(lambda: [
+            buffer.add(user.id, item_id, seconds) for item_id, seconds in pending
+        ])
+        updates = [update for update in updates if update.completed_at is not None]
+    if not updates:
+        return set()
+    now = timezone.now()
+    by_item = {update.playlist_item.id: update for update in updates}
+
+    with transaction.atomic():
+        upsert(
+            Progress,
+            [{
+                'user': user.id,
+                'playlist_item': item_id,
+                'is_completed': False,
+                'time_spent_seconds': update.seconds,
+                'completed_at': None,
+                'last_accessed': now,
+            } for item_id, update in by_item.items()],
+            conflict_fields=['user', 'playlist_item'],
+            increments=['time_spent_seconds'],
+            replace=['last_accessed'],
+        )
+        bump_progress_versions(user.id)
+
+        completing = {
+            item_id: update.completed_at
+            for item_id, update in by_item.items() if update.completed_at
+        }
+        if not completing:
+            return set()
+
+        # Rows are locked by the upsert above, so the completions read here
+        # cannot be claimed by a concurrent request
+        newly_completed = set(Progress.objects.filter(
+            user=user,
+            playlist_item_id__in=completing,
+            is_completed=False
+        ).values_list('playlist_item_id', flat=True))
+        if not newly_completed:
+            return set()
+
+        Progress.objects.filter(
+            user=user,
+            playlist_item_id__in=newly_completed
+        ).update(
+            is_completed=True,
+            completed_at=Case(
+                *[When(playlist_item_id=item_id, then=Value(completing[item_id]))
+                  for item_id in newly_completed],
+                output_field=models.DateTimeField(),
+            )
+        )
+
+        days = {}
+        for item_id in newly_completed:
+            day = days.setdefault(completing[item_id].date(), {'minutes': 0, 'items': 0})
+            day['minutes'] += by_item[item_id].seconds // 60
+            day['items'] += 1
+        upsert(
+            LearningStreak,
+            [{
+                'user': user.id,
+                'date': date,
+                'minutes_learned': day['minutes'],
+                'items_completed': day['items'],
+            } for date, day in days.items()],
+            conflict_fields=['user', 'date'],
+            increments=['minutes_learned', 'items_completed'],
+        )
+        summary = None
+        for date in sorted(days):
+            if days[date]['minutes']:
+                summary = streaks.record_active_day(user.id, date)
+
+        transaction.on_commit(lambda: leaderboards.record(
+            user.id,
+            minutes_by_date={date: day['minutes'] for date, day in days.items()},
+            completed_playlists=[
+                by_item[item_id].playlist_item.playlist_id for item_id in newly_completed
+            ],
+            streak=summary,
+        ))
+    return newly_completed
+
+
+def record_progress(user, playlist_item, seconds=0, completed=False):
+    """Add watch time to an item and optionally mark it completed.
+
+    Returns the ``Progress`` row including buffered watch time; it is
+    unsaved if only buffered time exists so far. A first completion also
+    counts towards today's ``LearningStreak``.
+    """
+    apply_progress(user, [ProgressUpdate(
+        playlist_item,
+        seconds=seconds,
+        completed_at=timezone.now() if completed else None
+    )])
+    progress = Progress.objects.filter(user=user, playlist_item=playlist_item).first()
+    if progress is None:
+        progress = Progress(user=user, playlist_item=playlist_item)
+    progress.time_spent_seconds += buffer.pending_for(user.id).get(playlist_item.id, 0)
+    return progress
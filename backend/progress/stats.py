@@ -0,0 +1,62 @@
+"""
+Cached dashboard statistics.
+
+``overall_stats`` costs two queries on a miss, one aggregate over the
+user's progress rows and one grouped by playlist, plus a primary key
+lookup of the user's ``ProgressVersion`` that keys the entry. Every
+progress write bumps that version, so an entry cached before the write
+is never read again by any process. Other changes, such as items added
+to a playlist, show up once the entry expires.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Q, Sum
+
+from .models import Progress, ProgressVersion
+
+
+def _cache_key(user_id, version):
+    return f'progress-stats:{user_id}:{version}'
+
+
+def compute(user):
+    """Completed items, stored watch time and per-playlist completion."""
+    progress = Progress.objects.filter(user=user).order_by()
+    totals = progress.aggregate(
+        completed=Count('id', filter=Q(is_completed=True)),
+        seconds=Sum('time_spent_seconds')
+    )
+
+    playlists = progress.values(
+        playlist_id=F('playlist_item__playlist_id'),
+        title=F('playlist_item__playlist__title'),
+        item_count=F('playlist_item__playlist__item_count'),
+    ).annotate(
+        completed=Count('id', filter=Q(is_completed=True)),
+        last_studied=Max('last_accessed')
+    ).order_by('-last_studied', 'playlist_id')
+
+    return {
+        'total_items_completed': totals['completed'],
+        'total_time_seconds': totals['seconds'] or 0,
+        'playlist_progress': [
+            {
+                'id': row['playlist_id'],
+                'title': row['title'],
+                'progress': round(min(row['completed'] / row['item_count'], 1) * 100, 1)
+            }
+            for row in playlists if row['item_count'] > 0
+        ],
+    }
+
+
+def overall_stats(user):
+    # Read the version before the rows the entry is computed from
+    version = ProgressVersion.objects.filter(user=user).values_list('version', flat=True).first()
+    key = _cache_key(user.id, version or 0)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute(user)
+        cache.set(key, stats, settings.PROGRESS_STATS_CACHE_TIMEOUT)
+    return stats
+
@@ -0,0 +1,74 @@
+"""
+Streak bookkeeping.
+
+A day is active once its ``LearningStreak`` row has learned minutes. Each
+user's ``StreakSummary`` is advanced in constant time whenever a day
+becomes active, so reads never scan the streak history. Only an active
+day recorded out of order (a backdated completion) falls back to
+recomputing the summary from the history.
+"""
+from datetime import timedelta
+
+from .models import LearningStreak, StreakSummary
+
+
+def summarize(dates):
+    """(current, longest, last active date) for ascending active ``dates``."""
+    current = longest = 0
+    previous = None
+    for date in dates:
+        if previous is not None and date == previous + timedelta(days=1):
+            current += 1
+        elif date != previous:
+            current = 1
+        longest = max(longest, current)
+        previous = date
+    return current, longest, previous
+
+
+def rebuild(user_id):
+    """Recompute a user's summary from their whole history."""
+    dates = LearningStreak.objects.filter(
+        user_id=user_id,
+        minutes_learned__gt=0
+    ).order_by('date').values_list('date', flat=True)
+    current, longest, last_active = summarize(dates.iterator())
+    summary, _ = StreakSummary.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'current_streak': current,
+            'longest_streak': longest,
+            'last_active_date': last_active,
+        }
+    )
+    return summary
+
+
+def record_active_day(user_id, date):
+    """Advance the summary for an active ``date`` and return it.
+
+    Call inside a transaction.
+    """
+    summary, _ = StreakSummary.objects.select_for_update().get_or_create(user_id=user_id)
+    last_active = summary.last_active_date
+
+    if last_active == date:
+        return summary
+    if last_active is not None and date < last_active:
+        return rebuild(user_id)
+
+    if last_active == date - timedelta(days=1):
+        summary.current_streak += 1
+    else:
+        summary.current_streak = 1
+    summary.longest_streak = max(summary.longest_streak, summary.current_streak)
+    summary.last_active_date = date
+    summary.save(update_fields=['current_streak', 'longest_streak', 'last_active_date', 'updated_at'])
+    return summary
+
+
+def current_streak(summary, today):
+    """The streak as of ``today``; it only counts once today is active."""
+    if summary is None or summary.last_active_date != today:
+        return 0
+    return summary.current_streak
@@ -0,0 +1,282 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from playlists.models import Playlist, PlaylistItem
+from . import bitmaps, buffer, leaderboards, services, stats
+from .models import LearningStreak, Progress, StreakSummary
+
+
+class BufferedProgressTests(TransactionTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='learner', email='learner@example.com', password='pass'
+        )
+        playlist = Playlist.objects.create(creator=self.user, title='Course')
+        self.item = PlaylistItem.objects.create(
+            playlist=playlist, title='Lesson', url='https://example.com/lesson'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def tearDown(self):
+        buffer.flush()
+    
+    def stored_seconds(self, item=None):
+        return Progress.objects.filter(
+            user=self.user,
+            playlist_item=item or self.item
+        ).values_list('time_spent_seconds', flat=True).first()
+    
+    def post_batch(self, client):
+        return client.post('/api/progress/batch/', {
+            'idempotency_key': 'retry-1',
+            'events': [{'playlist_item_id': self.item.id, 'seconds': 100}],
+        }, format='json')
+    
+    def test_duplicate_batch_that_loses_the_race_adds_no_watch_time(self):
+        apply_progress = services.apply_progress
+        
+        def retry_commits_first(user, updates):
+            newly_completed = apply_progress(user, updates)
+            # The retry runs on its own connection and commits its batch
+            # while this request still has its transaction open
+            def retry():
+                try:
+                    client = APIClient()
+                    client.force_authenticate(self.user)
+                    self.post_batch(client)
+                finally:
+                    connection.close()
+            with mock.patch.object(services, 'apply_progress', apply_progress):
+                thread = threading.Thread(target=retry)
+                thread.start()
+                thread.join()
+            return newly_completed
+        
+        with mock.patch.object(services, 'apply_progress', retry_commits_first):
+            response = self.post_batch(self.client)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['accepted'], 1)
+        self.assertEqual(buffer.pending_for(self.user.id), {self.item.id: 100})
+        buffer.flush()
+        self.assertEqual(self.stored_seconds(), 100)
+    
+    def test_size_triggered_flush_survives_the_callers_rollback(self):
+        other = PlaylistItem.objects.create(
+            playlist=self.item.playlist, title='Next', url='https://example.com/next'
+        )
+        pending = buffer.WriteBehindBuffer(flush_seconds=60, max_keys=2)
+        
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                pending.add(self.user.id, self.item.id, 30)
+                pending.add(self.user.id, other.id, 40)
+                # The flush runs on its own thread and connection
+                for _ in range(100):
+                    if not pending.pending_for(self.user.id):
+                        break
+                    time.sleep(0.05)
+                raise RuntimeError('request failed')
+        
+        self.assertEqual(self.stored_seconds(), 30)
+        self.assertEqual(self.stored_seconds(other), 40)
+        self.assertEqual(pending.pending_for(self.user.id), {})
+
+
+@override_settings(PROGRESS_BUFFER_FLUSH_SECONDS=0)
+class ConcurrentProgressTests(TransactionTestCase):
+    THREADS = 8
+    UPDATES = 30
+    
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='learner', email='learner@example.com', password='pass'
+        )
+        playlist = Playlist.objects.create(creator=self.user, title='Course')
+        self.items = [
+            PlaylistItem.objects.create(
+                playlist=playlist, title=f'Lesson {order}',
+                url='https://example.com/lesson', order=order
+            )
+            for order in range(3)
+        ]
+    
+    def send(self, thread, errors, start):
+        try:
+            start.wait()
+            for index in range(self.UPDATES):
+                item = self.items[(thread + index) % len(self.items)]
+                # Every thread completes every item once, racing the others
+                completed = index < len(self.items)
+                services.apply_progress(self.user, [services.ProgressUpdate(
+                    item,
+                    seconds=60,
+                    completed_at=timezone.now() if completed else None
+                )])
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+    
+    def test_parallel_updates_lose_no_increments(self):
+        errors = []
+        start = threading.Barrier(self.THREADS)
+        threads = [
+            threading.Thread(target=self.send, args=(thread, errors, start))
+            for thread in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+        rows = Progress.objects.filter(user=self.user).values_list(
+            'time_spent_seconds', 'is_completed'
+        )
+        self.assertEqual(sum(seconds for seconds, _ in rows), self.THREADS * self.UPDATES * 60)
+        self.assertEqual([completed for _, completed in rows], [True] * len(self.items))
+        
+        # Each item counts towards the streak once, however many threads completed it
+        streak = LearningStreak.objects.get(user=self.user, date=timezone.now().date())
+        self.assertEqual(streak.items_completed, len(self.items))
+        self.assertEqual(streak.minutes_learned, len(self.items))
+        summary = StreakSummary.objects.get(user=self.user)
+        self.assertEqual((summary.current_streak, summary.longest_streak), (1, 1))
+
+
+class CompletionBitmapTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='learner', email='learner@example.com', password='pass'
+        )
+        self.playlist = Playlist.objects.create(creator=self.user, title='Course')
+        self.items = [
+            PlaylistItem.objects.create(
+                playlist=self.playlist, title=f'Lesson {order}',
+                url='https://example.com/lesson', order=order
+            )
+            for order in range(3)
+        ]
+        cache.clear()
+    
+    def fresh_playlist(self):
+        return bitmaps.with_progress_version(Playlist.objects.all(), self.user.id).get(
+            id=self.playlist.id
+        )
+    
+    def test_completion_in_another_worker_is_not_served_stale(self):
+        playlist = self.fresh_playlist()
+        entry = bitmaps.get(playlist, self.user.id)
+        stale_key = bitmaps._cache_key(playlist, self.user.id)
+        
+        services.record_progress(self.user, self.items[1], completed=True)
+        # The worker that served the bitmap never saw the completion
+        cache.set(stale_key, entry)
+        
+        payload = bitmaps.as_payload(self.playlist, bitmaps.get(self.fresh_playlist(), self.user.id))
+        self.assertEqual(payload['completed_items'], 1)
+        self.assertEqual(payload['bitmap'], 'Ag==')
+
+
+class OverallStatsCacheTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='learner', email='learner@example.com', password='pass'
+        )
+        playlist = Playlist.objects.create(creator=self.user, title='Course', item_count=2)
+        self.item = PlaylistItem.objects.create(
+            playlist=playlist, title='Lesson', url='https://example.com/lesson'
+        )
+        cache.clear()
+    
+    def test_write_in_another_worker_is_not_served_stale(self):
+        cached = stats.overall_stats(self.user)
+        # No progress written yet
+        stale_key = stats._cache_key(self.user.id, 0)
+        self.assertEqual(cache.get(stale_key), cached)
+        
+        with self.settings(PROGRESS_BUFFER_FLUSH_SECONDS=0):
+            services.record_progress(self.user, self.item, seconds=90, completed=True)
+        # The worker that served the stats never saw the write
+        cache.set(stale_key, cached)
+        
+        with self.assertNumQueries(3):
+            overall = stats.overall_stats(self.user)
+        self.assertEqual(overall['total_items_completed'], 1)
+        self.assertEqual(overall['total_time_seconds'], 90)
+        with self.assertNumQueries(1):
+            self.assertEqual(stats.overall_stats(self.user), overall)
+
+
+class LeaderboardTests(SimpleTestCase):
+    def test_only_the_best_members_are_kept_in_order(self):
+        leaderboard = leaderboards.Leaderboard(size=3)
+        for member, score in enumerate([5, 9, 1, 7, 3, 8], start=1):
+            leaderboard.add(member, score)
+        
+        self.assertEqual(leaderboard.top(10), [(2, 9), (6, 8), (4, 7)])
+        self.assertEqual(len(leaderboard), 6)
+        self.assertEqual(leaderboard.rank(6), (2, 8))
+    
+    def test_member_outranking_the_last_entry_joins_the_top(self):
+        leaderboard = leaderboards.Leaderboard([(1, 9), (2, 8), (3, 7), (4, 2)], size=3)
+        leaderboard.add(4, 6)
+        
+        self.assertEqual(leaderboard.top(3), [(1, 9), (2, 8), (4, 8)])
+        self.assertEqual(leaderboard.rank(4), (3, 8))
+    
+    def test_members_below_the_top_rank_against_the_reconciled_scores(self):
+        leaderboard = leaderboards.Leaderboard([(1, 9), (2, 8), (3, 7), (4, 5), (5, 2)], size=2)
+        
+        self.assertEqual(leaderboard.rank(4), (4, 5))
+        self.assertEqual(leaderboard.rank(5), (5, 2))
+        self.assertIsNone(leaderboard.rank(6))
+
+
+class LeaderboardReconcileTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        today = timezone.now().date()
+        self.users = []
+        for minutes in (30, 90, 60):
+            user = User.objects.create_user(
+                username=f'learner{minutes}', email=f'learner{minutes}@example.com', password='pass'
+            )
+            LearningStreak.objects.create(user=user, date=today, minutes_learned=minutes)
+            self.users.append(user)
+    
+    def test_boards_load_from_the_reconciled_snapshot(self):
+        leaderboards.reconcile()
+        registry = leaderboards._Registry()
+        
+        # The snapshot row and its scores, no aggregate over the raw rows
+        with self.assertNumQueries(2):
+            board = registry.get(leaderboards.WEEKLY_MINUTES)
+        with self.assertNumQueries(0):
+            self.assertIs(registry.get(leaderboards.WEEKLY_MINUTES), board)
+        
+        first, second, third = self.users
+        self.assertEqual(board.top(3), [(second.id, 90), (third.id, 60), (first.id, 30)])
+        
+        registry.update(
+            leaderboards.WEEKLY_MINUTES, None, timezone.now().date(),
+            lambda leaderboard: leaderboard.add(first.id, 45)
+        )
+        self.assertEqual(board.standings(1, first.id), (3, [(second.id, 90)], (2, 75)))
+    
+    def test_board_without_a_snapshot_starts_empty(self):
+        registry = leaderboards._Registry()
+        
+        with self.assertNumQueries(1):
+            board = registry.get(leaderboards.STREAKS)
+        self.assertEqual(len(board), 0)
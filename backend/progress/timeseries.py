@@ -0,0 +1,76 @@
+"""
+Learning activity bucketed by day, week or month.
+
+Buckets are computed by the database with ``Trunc`` in one grouped query
+over ``LearningStreak``; empty buckets are filled in afterwards, so the
+cost of a series does not depend on the number of buckets.
+"""
+from datetime import timedelta
+
+from django.db.models import DateField, Sum
+from django.db.models.functions import Trunc
+
+from .models import LearningStreak
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def bucket_start(date, granularity):
+    """The first day of the bucket containing ``date``; weeks start on Monday."""
+    if granularity == 'week':
+        return date - timedelta(days=date.weekday())
+    if granularity == 'month':
+        return date.replace(day=1)
+    return date
+
+
+def next_bucket(date, granularity):
+    if granularity == 'week':
+        return date + timedelta(days=7)
+    if granularity == 'month':
+        return (date.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return date + timedelta(days=1)
+
+
+def bucket_starts(start, end, granularity):
+    """Every bucket start from the bucket of ``start`` through that of ``end``."""
+    current = bucket_start(start, granularity)
+    while current <= end:
+        yield current
+        current = next_bucket(current, granularity)
+
+
+def count_buckets(start, end, granularity):
+    if granularity == 'week':
+        return (bucket_start(end, 'week') - bucket_start(start, 'week')).days // 7 + 1
+    if granularity == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (end - start).days + 1
+
+
+def learning_series(user, start, end, granularity='day'):
+    """Minutes learned and items completed per bucket between two dates.
+
+    ``start`` and ``end`` are inclusive. Returns one dict per bucket,
+    oldest first, with ``period`` set to the first day of the bucket.
+    """
+    rows = LearningStreak.objects.filter(
+        user=user,
+        date__gte=start,
+        date__lte=end
+    ).order_by().annotate(
+        period=Trunc('date', granularity, output_field=DateField())
+    ).values('period').annotate(
+        minutes=Sum('minutes_learned'),
+        items_completed=Sum('items_completed')
+    )
+    totals = {row['period']: row for row in rows}
+
+    return [
+        {
+            'period': period,
+            'minutes': totals[period]['minutes'] if period in totals else 0,
+            'items_completed': totals[period]['items_completed'] if period in totals else 0,
+        }
+        for period in bucket_starts(start, end, granularity)
+    ]
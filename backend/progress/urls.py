@@ -1,16 +1,28 @@
 from django.urls import path
 from .views import (
     UpdateProgressView,
+    ProgressBatchView,
     PlaylistProgressView,
+    PlaylistProgressBitmapView,
+    PlaylistFunnelView,
+    PlaylistLeaderboardView,
+    LeaderboardView,
     OverallStatsView,
     LearningStreaksView,
     WeeklyInsightsView,
+    LearningTimeSeriesView,
 )
 
 urlpatterns = [
     path('', UpdateProgressView.as_view(), name='update_progress'),
+    path('batch/', ProgressBatchView.as_view(), name='progress_batch'),
     path('playlist/<int:playlist_id>/', PlaylistProgressView.as_view(), name='playlist_progress'),
+    path('playlist/<int:playlist_id>/bitmap/', PlaylistProgressBitmapView.as_view(), name='playlist_progress_bitmap'),
+    path('playlist/<int:playlist_id>/funnel/', PlaylistFunnelView.as_view(), name='playlist_funnel'),
+    path('playlist/<int:playlist_id>/leaderboard/', PlaylistLeaderboardView.as_view(), name='playlist_leaderboard'),
+    path('leaderboards/<str:board>/', LeaderboardView.as_view(), name='leaderboard'),
     path('stats/', OverallStatsView.as_view(), name='overall_stats'),
     path('streaks/', LearningStreaksView.as_view(), name='streaks'),
     path('weekly/', WeeklyInsightsView.as_view(), name='weekly_insights'),
+    path('timeseries/', LearningTimeSeriesView.as_view(), name='learning_timeseries'),
 ]
@@ -1,18 +1,24 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from django.db.models import Sum, Count
+from django.db.models import Count, F, Q, FilteredRelation
 from datetime import timedelta
 
-from .models import Progress, LearningStreak
+from . import bitmaps, buffer, funnel, leaderboards, services, stats, streaks, timeseries
+from .models import LearningStreak, ProgressBatch, StreakSummary
 from .serializers import (
     ProgressSerializer,
     LearningStreakSerializer,
     PlaylistProgressSerializer,
     WeeklyStatsSerializer,
+    ProgressBatchSerializer,
+    TimeSeriesQuerySerializer,
 )
+from playlists import access
 from playlists.models import PlaylistItem, Playlist
 
 
@@ -24,77 +30,166 @@ class UpdateProgressView(APIView):
         is_completed = request.data.get('is_completed', False)
         time_spent = request.data.get('time_spent_seconds', 0)
         
-        playlist_item = get_object_or_404(PlaylistItem, id=playlist_item_id)
+        try:
+            time_spent = int(time_spent)
+        except (TypeError, ValueError):
+            time_spent = -1
+        if time_spent < 0:
+            return Response(
+                {'error': 'time_spent_seconds must be a non-negative integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        progress, created = Progress.objects.get_or_create(
-            user=request.user,
-            playlist_item=playlist_item
+        playlist_item = get_object_or_404(
+            PlaylistItem.objects.select_related('playlist'),
+            id=playlist_item_id
         )
         
-        progress.time_spent_seconds += time_spent
-        
-        if is_completed and not progress.is_completed:
-            progress.is_completed = True
-            progress.completed_at = timezone.now()
-            
-            # Update learning streak
-            today = timezone.now().date()
-            streak, _ = LearningStreak.objects.get_or_create(
-                user=request.user,
-                date=today
-            )
-            streak.items_completed += 1
-            streak.minutes_learned += time_spent // 60
-            streak.save()
-        
-        progress.save()
+        progress = services.record_progress(
+            request.user,
+            playlist_item,
+            seconds=time_spent,
+            completed=is_completed
+        )
         
         return Response({
             'progress': ProgressSerializer(progress).data
         })
 
 
+class ProgressBatchView(APIView):
+    """Record a batch of progress events from the player.
+    
+    Events are coalesced per item, so the whole batch costs one item
+    lookup and one write transaction however many heartbeats it carries.
+    Retrying with the same ``idempotency_key`` (or ``Idempotency-Key``
+    header) replays the stored response instead of counting the events
+    again. ``client_ts`` of a completing event becomes its completion time,
+    clamped to ``MAX_EVENT_AGE`` in the past and to the present.
+    """
+    
+    MAX_EVENT_AGE = timedelta(days=1)
+    
+    def post(self, request):
+        data = request.data
+        if isinstance(data, list):
+            data = {'events': data}
+        serializer = ProgressBatchSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        events = serializer.validated_data['events']
+        key = (
+            serializer.validated_data.get('idempotency_key')
+            or request.headers.get('Idempotency-Key')
+        )
+        
+        if key:
+            replay = ProgressBatch.objects.filter(
+                user=request.user,
+                idempotency_key=key
+            ).values_list('response', flat=True).first()
+            if replay is not None:
+                return Response(replay)
+        
+        items = PlaylistItem.objects.select_related('playlist').in_bulk(
+            {event['playlist_item_id'] for event in events}
+        )
+        now = timezone.now()
+        
+        updates = {}
+        unknown_items = set()
+        for event in sorted(events, key=lambda event: event.get('client_ts') or now):
+            item = items.get(event['playlist_item_id'])
+            if item is None:
+                unknown_items.add(event['playlist_item_id'])
+                continue
+            update = updates.setdefault(item.id, services.ProgressUpdate(item))
+            update.seconds += event['seconds']
+            if event['completed'] and update.completed_at is None:
+                client_ts = event.get('client_ts') or now
+                update.completed_at = min(max(client_ts, now - self.MAX_EVENT_AGE), now)
+        
+        try:
+            with transaction.atomic():
+                newly_completed = services.apply_progress(request.user, list(updates.values()))
+                result = {
+                    'accepted': len(events),
+                    'items': len(updates),
+                    'newly_completed': sorted(newly_completed),
+                    'unknown_items': sorted(unknown_items),
+                }
+                if key:
+                    # Rolls the batch back if a concurrent retry got there first
+                    ProgressBatch.objects.create(
+                        user=request.user,
+                        idempotency_key=key,
+                        event_count=len(events),
+                        response=result
+                    )
+        except IntegrityError:
+            if not key:
+                raise
+            return Response(ProgressBatch.objects.get(
+                user=request.user,
+                idempotency_key=key
+            ).response)
+        
+        return Response(result)
+
+
 class PlaylistProgressView(APIView):
     """Get progress for all items in a playlist."""
     
     def get(self, request, playlist_id):
-        playlist = get_object_or_404(Playlist, id=playlist_id)
+        playlist = get_object_or_404(
+            bitmaps.with_progress_version(
+                Playlist.objects.only('id', 'title', 'creator_id', 'is_public', 'version'),
+                request.user.id
+            ),
+            id=playlist_id
+        )
         
-        total_items = playlist.items.count()
-        completed_items = Progress.objects.filter(
-            user=request.user,
-            playlist_item__playlist=playlist,
-            is_completed=True
-        ).count()
+        # Check permission
+        if not access.can_view(request, playlist):
+            return Response(
+                {'error': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
-        total_time = Progress.objects.filter(
-            user=request.user,
-            playlist_item__playlist=playlist
-        ).aggregate(total=Sum('time_spent_seconds'))['total'] or 0
+        # Every item with the user's progress row, if any, in one LEFT JOIN
+        items = playlist.items.annotate(
+            user_progress=FilteredRelation('progress', condition=Q(progress__user=request.user))
+        ).values(
+            'id', 'title',
+            is_completed=F('user_progress__is_completed'),
+            time_spent_seconds=F('user_progress__time_spent_seconds'),
+        )
+        
+        item_progress = [
+            {
+                'item_id': item['id'],
+                'title': item['title'],
+                'is_completed': bool(item['is_completed']),
+                'time_spent_seconds': item['time_spent_seconds'] or 0
+            }
+            for item in items
+        ]
+        
+        # Include watch time still in the write-behind buffer
+        pending = buffer.pending_for(request.user.id)
+        for item in item_progress:
+            item['time_spent_seconds'] += pending.get(item['item_id'], 0)
         
+        total_items = len(item_progress)
+        completed_ids = {item['item_id'] for item in item_progress if item['is_completed']}
+        completed_items = len(completed_ids)
+        total_time = sum(item['time_spent_seconds'] for item in item_progress)
         progress_percentage = (completed_items / total_items * 100) if total_items > 0 else 0
         
-        # Get progress for each item
-        item_progress = []
-        for item in playlist.items.all():
-            try:
-                progress = Progress.objects.get(
-                    user=request.user,
-                    playlist_item=item
-                )
-                item_progress.append({
-                    'item_id': item.id,
-                    'title': item.title,
-                    'is_completed': progress.is_completed,
-                    'time_spent_seconds': progress.time_spent_seconds
-                })
-            except Progress.DoesNotExist:
-                item_progress.append({
-                    'item_id': item.id,
-                    'title': item.title,
-                    'is_completed': False,
-                    'time_spent_seconds': 0
-                })
+        # Refresh the cached bitmap while the data is at hand
+        bitmaps.store(
+            playlist, request.user.id,
+            [item['item_id'] for item in item_progress], completed_ids
+        )
         
         return Response({
             'playlist_id': playlist_id,
@@ -107,45 +202,146 @@ class PlaylistProgressView(APIView):
         })
 
 
+class PlaylistProgressBitmapView(APIView):
+    """Completion bitmap of a playlist for the requesting user.
+    
+    Bit ``i`` (least significant bit first) is set when the ``i``-th item
+    in playlist order is completed. ``version`` matches the playlist
+    version the item order was taken from. Served from the cache.
+    """
+    
+    def get(self, request, playlist_id):
+        playlist = get_object_or_404(
+            bitmaps.with_progress_version(
+                Playlist.objects.only('id', 'creator_id', 'is_public', 'version'),
+                request.user.id
+            ),
+            id=playlist_id
+        )
+        
+        # Check permission
+        if not access.can_view(request, playlist):
+            return Response(
+                {'error': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        entry = bitmaps.get(playlist, request.user.id)
+        return Response(bitmaps.as_payload(playlist, entry))
+
+
+class PlaylistFunnelView(APIView):
+    """Drop-off funnel of a playlist for its owner and editors."""
+    
+    def get(self, request, playlist_id):
+        playlist = get_object_or_404(
+            Playlist.objects.only('id', 'creator_id', 'is_public', 'version'),
+            id=playlist_id
+        )
+        
+        # Check permission
+        if not access.can_edit(request, playlist):
+            return Response(
+                {'error': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        stored = funnel.get(playlist)
+        return Response(dict(stored.data, computed_at=stored.computed_at))
+
+
+class LeaderboardMixin:
+    """Renders a leaderboard as the top entries plus the user's own rank."""
+    
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = leaderboards.TOP_SIZE
+    
+    def leaderboard_response(self, request, name, leaderboard):
+        try:
+            limit = int(request.query_params.get('limit', self.DEFAULT_LIMIT))
+        except ValueError:
+            limit = self.DEFAULT_LIMIT
+        learners, top, mine = leaderboard.standings(
+            max(1, min(limit, self.MAX_LIMIT)), request.user.id
+        )
+        
+        usernames = dict(
+            get_user_model().objects.filter(
+                id__in=[user_id for user_id, _ in top]
+            ).values_list('id', 'username')
+        )
+        
+        return Response({
+            'board': name,
+            'learners': learners,
+            'entries': [
+                {
+                    'rank': rank,
+                    'user_id': user_id,
+                    'username': usernames.get(user_id),
+                    'score': score
+                }
+                for rank, (user_id, score) in enumerate(top, start=1)
+            ],
+            'me': {'rank': mine[0], 'score': mine[1]} if mine else None
+        })
+
+
+class LeaderboardView(LeaderboardMixin, APIView):
+    """Global leaderboards: ``weekly_minutes`` or ``streaks``."""
+    
+    BOARDS = (leaderboards.WEEKLY_MINUTES, leaderboards.STREAKS)
+    
+    def get(self, request, board):
+        if board not in self.BOARDS:
+            return Response(
+                {'error': 'Unknown leaderboard'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return self.leaderboard_response(request, board, leaderboards.get(board))
+
+
+class PlaylistLeaderboardView(LeaderboardMixin, APIView):
+    """Learners who completed the most items of a playlist."""
+    
+    def get(self, request, playlist_id):
+        playlist = get_object_or_404(
+            Playlist.objects.only('id', 'creator_id', 'is_public', 'version'),
+            id=playlist_id
+        )
+        
+        # Check permission
+        if not access.can_view(request, playlist):
+            return Response(
+                {'error': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return self.leaderboard_response(
+            request,
+            leaderboards.PLAYLIST_COMPLETIONS,
+            leaderboards.get(leaderboards.PLAYLIST_COMPLETIONS, playlist.id)
+        )
+
+
 class OverallStatsView(APIView):
-    """Get overall learning statistics."""
+    """Get overall learning statistics.
+    
+    ``playlist_progress`` covers every playlist the user has progress in,
+    most recently studied first.
+    """
     
     def get(self, request):
-        user = request.user
-        
-        # Total stats
-        total_completed = Progress.objects.filter(
-            user=user,
-            is_completed=True
-        ).count()
-        
-        total_time = Progress.objects.filter(
-            user=user
-        ).aggregate(total=Sum('time_spent_seconds'))['total'] or 0
-        
-        # Playlist progress
-        playlists = Playlist.objects.filter(creator=user)
-        playlist_progress = []
-        
-        for playlist in playlists[:5]:  # Top 5 playlists
-            total_items = playlist.items.count()
-            completed = Progress.objects.filter(
-                user=user,
-                playlist_item__playlist=playlist,
-                is_completed=True
-            ).count()
-            
-            if total_items > 0:
-                playlist_progress.append({
-                    'id': playlist.id,
-                    'title': playlist.title,
-                    'progress': round(completed / total_items * 100, 1)
-                })
+        overall = stats.overall_stats(request.user)
+        # Include watch time still in the write-behind buffer
+        total_time = overall['total_time_seconds'] + sum(
+            buffer.pending_for(request.user.id).values()
+        )
         
         return Response({
-            'total_items_completed': total_completed,
+            'total_items_completed': overall['total_items_completed'],
             'total_time_minutes': total_time // 60,
-            'playlist_progress': playlist_progress
+            'playlist_progress': overall['playlist_progress']
         })
 
 
@@ -157,46 +353,20 @@ class LearningStreaksView(APIView):
         today = timezone.now().date()
         
         # Get last 30 days of streaks
-        streaks = LearningStreak.objects.filter(
+        recent = LearningStreak.objects.filter(
             user=user,
             date__gte=today - timedelta(days=30)
         ).order_by('-date')
         
-        # Calculate current streak
-        current_streak = 0
-        check_date = today
-        
-        for streak in streaks:
-            if streak.date == check_date and streak.minutes_learned > 0:
-                current_streak += 1
-                check_date -= timedelta(days=1)
-            else:
-                break
-        
-        # Calculate longest streak
-        all_streaks = LearningStreak.objects.filter(
-            user=user,
-            minutes_learned__gt=0
-        ).order_by('date')
-        
-        longest_streak = 0
-        temp_streak = 0
-        prev_date = None
-        
-        for streak in all_streaks:
-            if prev_date is None or streak.date == prev_date + timedelta(days=1):
-                temp_streak += 1
-            else:
-                longest_streak = max(longest_streak, temp_streak)
-                temp_streak = 1
-            prev_date = streak.date
-        
-        longest_streak = max(longest_streak, temp_streak)
+        # Both streaks come from the incrementally maintained summary
+        summary = StreakSummary.objects.filter(user=user).first()
+        current_streak = streaks.current_streak(summary, today)
+        longest_streak = summary.longest_streak if summary else 0
         
         return Response({
             'current_streak': current_streak,
             'longest_streak': longest_streak,
-            'recent_activity': LearningStreakSerializer(streaks, many=True).data
+            'recent_activity': LearningStreakSerializer(recent, many=True).data
         })
 
 
@@ -208,36 +378,42 @@ class WeeklyInsightsView(APIView):
         today = timezone.now().date()
         week_start = today - timedelta(days=7)
         
-        weekly_streaks = LearningStreak.objects.filter(
-            user=user,
-            date__gte=week_start
-        )
+        # Totals include today; the daily breakdown covers the 7 days before it
+        days = timeseries.learning_series(user, week_start, today, 'day')
+        
+        return Response({
+            'total_minutes': sum(day['minutes'] for day in days),
+            'items_completed': sum(day['items_completed'] for day in days),
+            'daily_breakdown': [
+                {'date': day['period'].isoformat(), 'minutes': day['minutes']}
+                for day in days[:7]
+            ]
+        })
+
+
+class LearningTimeSeriesView(APIView):
+    """Learning activity over an arbitrary range.
+    
+    ``?start=`` and ``?end=`` (inclusive, default the last 7 days) and
+    ``?granularity=`` (``day``, ``week`` or ``month``). Every bucket in the
+    range is returned, empty ones with zeros; ``period`` is the first day
+    of the bucket and weeks start on Monday.
+    """
+    
+    def get(self, request):
+        serializer = TimeSeriesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        start = serializer.validated_data['start']
+        end = serializer.validated_data['end']
+        granularity = serializer.validated_data['granularity']
         
-        total_minutes = weekly_streaks.aggregate(
-            total=Sum('minutes_learned')
-        )['total'] or 0
-        
-        items_completed = weekly_streaks.aggregate(
-            total=Sum('items_completed')
-        )['total'] or 0
-        
-        daily_breakdown = []
-        for i in range(7):
-            date = week_start + timedelta(days=i)
-            try:
-                streak = weekly_streaks.get(date=date)
-                daily_breakdown.append({
-                    'date': date.isoformat(),
-                    'minutes': streak.minutes_learned
-                })
-            except LearningStreak.DoesNotExist:
-                daily_breakdown.append({
-                    'date': date.isoformat(),
-                    'minutes': 0
-                })
+        buckets = timeseries.learning_series(request.user, start, end, granularity)
         
         return Response({
-            'total_minutes': total_minutes,
-            'items_completed': items_completed,
-            'daily_breakdown': daily_breakdown
+            'start': start,
+            'end': end,
+            'granularity': granularity,
+            'total_minutes': sum(bucket['minutes'] for bucket in buckets),
+            'items_completed': sum(bucket['items_completed'] for bucket in buckets),
+            'buckets': buckets
         })